@@ -0,0 +1,68 @@
+# backend/alerts.py
+"""Incremental low-stock evaluation.
+
+The effective reorder level of an item is its own reorder_level, or else its
+category's. Writers pass only the item ids they touched; the low_stock_alerts
+table then always holds exactly the live items at or below their level, so
+reading alerts never scans the items table.
+"""
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from database import Item, Category, LowStockAlert
+
+
+def evaluate_items(db, item_ids):
+    """Updates low_stock_alerts for the given items without committing.
+
+    Returns (raised, cleared) lists of alert dicts for live items whose state changed.
+    """
+    item_ids = list(set(item_ids))
+    if not item_ids:
+        return [], []
+    rows = (
+        db.query(
+            Item.id, Item.name, Item.quantity, Item.category_id, Item.deleted_at,
+            func.coalesce(Item.reorder_level, Category.reorder_level).label("reorder_level")
+        )
+        .outerjoin(Category, Item.category_id == Category.id)
+        .filter(Item.id.in_(item_ids))
+        .all()
+    )
+    current = {
+        item_id for (item_id,) in db.query(LowStockAlert.item_id).filter(LowStockAlert.item_id.in_(item_ids))
+    }
+
+    # Concurrent writers may evaluate the same item, so every change is a guarded statement: only the
+    # writer whose insert or delete actually hit the row reports it, and nobody fails on the other's
+    raised, cleared = [], []
+    for row in rows:
+        had_alert = row.id in current
+        current.discard(row.id)
+        below = row.deleted_at is None and row.reorder_level is not None and row.quantity <= row.reorder_level
+        state = {
+            "item_id": row.id,
+            "name": row.name,
+            "category_id": row.category_id,
+            "quantity": row.quantity,
+            "reorder_level": row.reorder_level
+        }
+        values = {"category_id": row.category_id, "quantity": row.quantity, "reorder_level": row.reorder_level}
+        if below and not had_alert:
+            try:
+                with db.begin_nested():
+                    db.add(LowStockAlert(item_id=row.id, **values))
+                raised.append(state)
+            except IntegrityError:
+                # Raised by another writer in the meantime; it reports it, we only refresh the numbers
+                had_alert = True
+        if below and had_alert:
+            db.query(LowStockAlert).filter(LowStockAlert.item_id == row.id).update(values, synchronize_session=False)
+        elif not below and had_alert:
+            deleted = db.query(LowStockAlert).filter(LowStockAlert.item_id == row.id).delete(synchronize_session=False)
+            # Deleted items drop out quietly; only restocks are reported
+            if deleted and row.deleted_at is None:
+                cleared.append(state)
+    # Alerts whose item row no longer exists at all
+    if current:
+        db.query(LowStockAlert).filter(LowStockAlert.item_id.in_(current)).delete(synchronize_session=False)
+    return raised, cleared
@@ -0,0 +1,312 @@
+# backend/analytics.py
+"""Reporting queries on an embedded DuckDB over Parquet snapshots of the inventory.
+
+Snapshots are exported from the OLTP database in batches (see export.py) and
+refreshed in the background every ANALYTICS_REFRESH_SECONDS into a directory of
+this process's own under ANALYTICS_DIR. Items are rewritten whole; logs are
+append-only, so each refresh only adds a part file with the new rows plus the rows
+stamped in a short overlap before the previous refresh (a row commits after its id is
+taken, so it can appear below ids already exported). Each part keeps only the ids no
+later part covers, and archived log months are read in place. Replaced files are deleted only after the
+queries reading them finish. Queries run on their own thread pool and never
+touch the OLTP connection pool.
+"""
+import os
+import glob
+import atexit
+import shutil
+import socket
+import asyncio
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from database import SessionLocal, Log
+import export
+import logstore
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "300"))
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "2"))
+ANALYTICS_MEMORY_LIMIT = os.getenv("ANALYTICS_MEMORY_LIMIT", "1GB")
+MAX_LOG_PARTS = 50  # merged into one file beyond this
+# Longest a transaction writing logs is expected to stay open; its rows are exported again on the next refresh
+LOG_OVERLAP = timedelta(seconds=float(os.getenv("ANALYTICS_LOG_OVERLAP_SECONDS", "60")))
+
+LOG_COLUMNS = (
+    "id::BIGINT AS id, action::VARCHAR AS action, item_id::BIGINT AS item_id, "
+    "category_id::BIGINT AS category_id, quantity_change::BIGINT AS quantity_change, "
+    "description::VARCHAR AS description, timestamp::TIMESTAMP AS timestamp"
+)
+
+
+def _sql_string(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _sql_list(paths):
+    return "[" + ", ".join(_sql_string(path) for path in paths) + "]"
+
+
+def _log_parts_sql(log_parts, columns):
+    # log_parts are (path, after_id): a part holds ids above after_id, and later parts win for their ids
+    selects, bound = [], None
+    for path, after_id in reversed(log_parts):
+        where = f" WHERE id <= {bound}" if bound is not None else ""
+        selects.append(f"SELECT {columns} FROM read_parquet({_sql_string(path)}){where}")
+        bound = after_id if bound is None else min(bound, after_id)
+    return " UNION ALL ".join(reversed(selects))
+
+
+def _running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AnalyticsStore:
+    def __init__(self, directory=ANALYTICS_DIR):
+        self.directory = directory
+        self.snapshot_dir = None
+        self.conn = None
+        self.refreshed_at = None
+        self.max_log_id = 0
+        self.log_overlap_from = None  # start of the last refresh; rows stamped after it minus LOG_OVERLAP are exported again
+        self.archives = None
+        self.items_path = None
+        self.log_parts = []  # (path, after_id)
+        # Every refresh is a new generation of files. Files a refresh replaced are retired and only
+        # deleted once no query that started on an older generation is still reading them
+        self.generation = 0
+        self._active = {}  # generation -> running queries
+        self._retired = []  # (last generation that used them, paths)
+        self._lock = threading.Lock()  # one refresh at a time
+        self._state_lock = threading.Lock()  # guards the fields queries read
+        self._refreshing = False
+        # Refreshes get their own thread so a long export never queues behind queries
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics-refresh")
+        self.pool = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix="analytics")
+
+    def _connect(self):
+        import duckdb
+
+        # Each server process builds its snapshot in its own directory, so workers sharing
+        # ANALYTICS_DIR never overwrite or delete each other's files
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_stale_snapshots()
+        self.snapshot_dir = tempfile.mkdtemp(prefix=f"snapshot-{socket.gethostname()}-{os.getpid()}-", dir=self.directory)
+        atexit.register(shutil.rmtree, self.snapshot_dir, True)
+
+        conn = duckdb.connect()
+        conn.execute(f"SET memory_limit = '{ANALYTICS_MEMORY_LIMIT}'")
+        conn.execute(f"SET threads = {max(1, ANALYTICS_WORKERS)}")
+        return conn
+
+    def _remove_stale_snapshots(self):
+        # Snapshots left by processes on this host that are no longer running
+        prefix = f"snapshot-{socket.gethostname()}-"
+        for path in glob.glob(os.path.join(self.directory, prefix + "*")):
+            pid = os.path.basename(path)[len(prefix):].split("-", 1)[0]
+            if pid.isdigit() and not _running(int(pid)):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _path(self, name):
+        return os.path.join(self.snapshot_dir, name)
+
+    def refresh(self):
+        with self._lock:
+            if self.conn is None:
+                self.conn = self._connect()
+
+            # New files get new names; nothing a query may be reading is touched until after the swap
+            generation = self.generation + 1
+            started = datetime.utcnow()
+            written, retired = [], []
+            log_parts, max_log_id, overlap_from = list(self.log_parts), self.max_log_id, self.log_overlap_from
+            try:
+                # Archiving moves rows from the table into month files; rebuild the parts when that happens
+                archives = tuple(logstore.archived_months().values())
+                if archives != self.archives:
+                    retired += [path for path, _ in log_parts]
+                    log_parts, max_log_id, overlap_from = [], 0, None
+
+                items_path = self._path(f"items-{generation:06d}.parquet")
+                export.write_file(export.export_items("parquet"), items_path)
+                written.append(items_path)
+
+                db = SessionLocal()
+                try:
+                    table_max_id = db.query(func.max(Log.id)).scalar() or 0
+                    after_id = max_log_id
+                    if overlap_from is not None:
+                        overlap_id = db.query(func.min(Log.id)).filter(Log.timestamp >= overlap_from - LOG_OVERLAP).scalar()
+                        if overlap_id is not None:
+                            after_id = min(after_id, overlap_id - 1)
+                finally:
+                    db.close()
+                if table_max_id > after_id:
+                    path = self._path(f"logs-part-{after_id + 1:012d}-{generation:06d}.parquet")
+                    export.write_file(export.export_log_table("parquet", after_id, table_max_id), path)
+                    written.append(path)
+                    log_parts.append((path, after_id))
+                    max_log_id = max(max_log_id, table_max_id)
+
+                if len(log_parts) > MAX_LOG_PARTS:
+                    merged = self._path(f"logs-merged-{generation:06d}.parquet")
+                    self.conn.execute(f"COPY ({_log_parts_sql(log_parts, '*')}) TO {_sql_string(merged)} (FORMAT parquet)")
+                    written.append(merged)
+                    retired += [path for path, _ in log_parts]
+                    log_parts = [(merged, log_parts[0][1])]
+            except BaseException:
+                for path in written:
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+
+            with self._state_lock:
+                self._create_views(items_path, archives, log_parts)
+                if self.items_path is not None:
+                    retired.append(self.items_path)
+                current = {path for path, _ in log_parts}
+                self._retired.append((self.generation, [path for path in retired if path not in current]))
+                self.items_path, self.archives, self.log_parts, self.max_log_id = items_path, archives, log_parts, max_log_id
+                self.log_overlap_from = started
+                self.generation = generation
+                self.refreshed_at = datetime.utcnow()
+        self._collect()
+
+    def _collect(self):
+        # Deletes retired files that no running query can still be reading
+        with self._state_lock:
+            oldest = min(self._active, default=self.generation)
+            ready = [paths for last_used, paths in self._retired if last_used < oldest]
+            self._retired = [(last_used, paths) for last_used, paths in self._retired if last_used >= oldest]
+        for path in (path for paths in ready for path in paths):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _create_views(self, items_path, archives, log_parts):
+        self.conn.execute(f"CREATE OR REPLACE VIEW items AS SELECT * FROM read_parquet('{items_path}')")
+
+        parquet = [path for path in archives if path.endswith(".parquet")]
+        ndjson = [path for path in archives if not path.endswith(".parquet")]
+        sources = []
+        if parquet:
+            sources.append(f"SELECT {LOG_COLUMNS} FROM read_parquet({_sql_list(parquet)})")
+        if log_parts:
+            sources.append(_log_parts_sql(log_parts, LOG_COLUMNS))
+        if ndjson:
+            sources.append(f"SELECT {LOG_COLUMNS} FROM read_json({_sql_list(ndjson)}, format = 'newline_delimited')")
+        if not sources:
+            sources.append(f"SELECT {LOG_COLUMNS} FROM (SELECT NULL AS id, NULL AS action, NULL AS item_id, "
+                           "NULL AS category_id, NULL AS quantity_change, NULL AS description, NULL AS timestamp) WHERE false")
+        self.conn.execute(f"CREATE OR REPLACE VIEW logs AS {' UNION ALL '.join(sources)}")
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(e)
+        finally:
+            self._refreshing = False
+
+    def ensure_fresh(self):
+        if self.refreshed_at is None:
+            self.refresh()
+        elif not self._refreshing and datetime.utcnow() - self.refreshed_at > timedelta(seconds=ANALYTICS_REFRESH_SECONDS):
+            # Serve the current snapshot while the next one is built
+            self._refreshing = True
+            self._refresher.submit(self._refresh_in_background)
+
+    def query(self, sql, params=()):
+        self.ensure_fresh()
+        with self._state_lock:
+            generation = self.generation
+            self._active[generation] = self._active.get(generation, 0) + 1
+            # A cursor is a separate DuckDB connection to the same database, safe to use per thread
+            cursor = self.conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetch_arrow_table().to_pylist()
+        finally:
+            cursor.close()
+            with self._state_lock:
+                self._active[generation] -= 1
+                if not self._active[generation]:
+                    del self._active[generation]
+            self._collect()
+
+    async def run(self, report, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, partial(report, self, *args))
+
+
+analytics_store = AnalyticsStore()
+
+
+def stock_by_category(store):
+    return store.query("""
+        SELECT category_id, any_value(category) AS category, count(*) AS items,
+               sum(quantity) AS total_quantity, count(*) FILTER (WHERE quantity = 0) AS out_of_stock
+        FROM items
+        GROUP BY category_id
+        ORDER BY total_quantity DESC
+    """)
+
+
+def stock_over_time(store, days, category_id=None):
+    # Level at the end of each day = current stock minus every change after that day.
+    # Only edits record quantity_change, so creates and deletes do not move the series.
+    category_filter = "AND category_id = ?" if category_id is not None else ""
+    params = [datetime.utcnow() - timedelta(days=days)] + ([category_id] if category_id is not None else [])
+    return store.query(f"""
+        WITH daily AS (
+            SELECT category_id, CAST(timestamp AS DATE) AS day, sum(quantity_change) AS net_change
+            FROM logs
+            WHERE quantity_change IS NOT NULL AND timestamp >= ? {category_filter}
+            GROUP BY ALL
+        ), current AS (
+            SELECT category_id, sum(quantity) AS quantity FROM items GROUP BY category_id
+        )
+        SELECT d.category_id, d.day, d.net_change,
+               c.quantity - coalesce(sum(d.net_change) OVER (
+                   PARTITION BY d.category_id ORDER BY d.day DESC
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0) AS quantity
+        FROM daily d LEFT JOIN current c USING (category_id)
+        ORDER BY d.category_id, d.day
+    """, params)
+
+
+def movement_velocity(store, days, limit):
+    return store.query("""
+        WITH moves AS (
+            SELECT item_id,
+                   coalesce(sum(-quantity_change) FILTER (WHERE quantity_change < 0), 0) AS consumed,
+                   coalesce(sum(quantity_change) FILTER (WHERE quantity_change > 0), 0) AS received,
+                   count(*) AS movements
+            FROM logs
+            WHERE quantity_change IS NOT NULL AND item_id IS NOT NULL AND timestamp >= ?
+            GROUP BY item_id
+        )
+        SELECT m.item_id, i.name, i.quantity, m.consumed, m.received, m.movements,
+               round(m.consumed / ?, 3) AS daily_consumption,
+               CASE WHEN m.consumed > 0 THEN round(i.quantity / (m.consumed / ?), 1) END AS days_of_cover
+        FROM moves m JOIN items i ON i.id = m.item_id
+        ORDER BY m.consumed DESC, m.item_id
+        LIMIT ?
+    """, [datetime.utcnow() - timedelta(days=days), days, days, limit])
+
+
+def status(store):
+    store.ensure_fresh()
+    return {
+        "refreshed_at": store.refreshed_at,
+        "max_log_id": store.max_log_id,
+        "log_parts": len(store.log_parts),
+        "archived_months": len(store.archives or ())
+    }
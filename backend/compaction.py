@@ -0,0 +1,54 @@
+# backend/compaction.py
+"""Purges soft-deleted items and categories once they are older than the retention window.
+
+Deleted rows are kept as tombstones so /sync clients learn about deletes; after
+TOMBSTONE_RETENTION_DAYS they are removed in small batches so the job never holds
+a long write lock. Logs keep the purged ids, so /logs/deleted_categories still finds
+them. Run it from cron:
+
+    python compaction.py --batch-size 1000
+"""
+import os
+import argparse
+from datetime import datetime, timedelta
+from database import SessionLocal, Item, Category
+
+TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30")))
+
+
+def _purge(db, model, cutoff, batch_size):
+    purged = 0
+    while True:
+        ids = [row_id for (row_id,) in db.query(model.id).filter(model.deleted_at < cutoff).limit(batch_size)]
+        if not ids:
+            return purged
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+
+
+def compact_tombstones(db, retention=TOMBSTONE_RETENTION, batch_size=1000):
+    cutoff = datetime.utcnow() - retention
+    # Items first: a deleted category's items were deleted no later than the category itself
+    return {
+        "items": _purge(db, Item, cutoff, batch_size),
+        "categories": _purge(db, Category, cutoff, batch_size)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge soft-deleted rows past the retention window")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--retention-days", type=float, default=TOMBSTONE_RETENTION.days)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        purged = compact_tombstones(db, timedelta(days=args.retention_days), args.batch_size)
+    finally:
+        db.close()
+    print(f"Purged {purged['items']} items and {purged['categories']} categories")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # backend/database.py
 import os
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import create_engine, inspect, text, CheckConstraint, Column, Integer, Float, String, ForeignKey, DateTime, Text, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -19,11 +19,25 @@ class Category(Base):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True)
+    name = Column(String, index=True)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.now())  # New creation date field
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    deleted_at = Column(DateTime, nullable=True)  # Soft delete; the row stays as a tombstone until compaction
+    reorder_level = Column(Integer, nullable=True)  # Default low-stock threshold for the category's items
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # ETag; checked on every ORM update
     items = relationship("Item", back_populates="category")
 
+    # Names only have to be unique among live categories, so a deleted name can be reused
+    __table_args__ = (
+        Index(
+            "uq_categories_live_name", "name", unique=True,
+            sqlite_where=text("deleted_at IS NULL"), postgresql_where=text("deleted_at IS NULL")
+        ),
+    )
+    # Flushes run UPDATE ... WHERE id = :id AND version = :v and bump the version; a lost race raises StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+
 class Item(Base):
     __tablename__ = "items"
 
@@ -33,24 +47,129 @@ class Item(Base):
     quantity = Column(Integer, default=0)
     category_id = Column(Integer, ForeignKey("categories.id"))
     created_at = Column(DateTime, default=datetime.utcnow)  # New creation date field
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Updated at field
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Updated at field
+    deleted_at = Column(DateTime, nullable=True)  # Soft delete; the row stays as a tombstone until compaction
+    reorder_level = Column(Integer, nullable=True)  # Overrides the category's threshold when set
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # ETag; checked on every ORM update
+    sku = Column(String, nullable=True)  # SKU or barcode read by scanning stations
 
     category = relationship("Category", back_populates="items")
 
+    __table_args__ = (
+        Index(
+            "ix_items_live_category_id", "category_id",
+            sqlite_where=text("deleted_at IS NULL"), postgresql_where=text("deleted_at IS NULL")
+        ),
+        # Codes are unique among live items, so a deleted item's label can be reused
+        Index(
+            "uq_items_live_sku", "sku", unique=True,
+            sqlite_where=text("deleted_at IS NULL"), postgresql_where=text("deleted_at IS NULL")
+        ),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
 class Log(Base):
     __tablename__ = "logs"
 
     id = Column(Integer, primary_key=True, index=True)
     action = Column(String, index=True)
-    item_id = Column(Integer, ForeignKey("items.id"), nullable=True)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    # No foreign keys: logs keep the ids of items and categories that compaction has purged
+    item_id = Column(Integer, nullable=True)
+    category_id = Column(Integer, nullable=True, index=True)
     quantity_change = Column(Integer, nullable=True)
     description = Column(String, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+
+    item = relationship("Item", primaryjoin="foreign(Log.item_id) == Item.id", viewonly=True)
+    category = relationship("Category", primaryjoin="foreign(Log.category_id) == Category.id", viewonly=True)
+
+class LowStockAlert(Base):
+    # Items currently at or below their reorder level, maintained as items change
+    __tablename__ = "low_stock_alerts"
+
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    category_id = Column(Integer, index=True)
+    quantity = Column(Integer)
+    reorder_level = Column(Integer)
+    triggered_at = Column(DateTime, default=datetime.utcnow)
+
+class Location(Base):
+    # A store or warehouse holding stock
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    total_quantity = Column(Integer, default=0)  # Sum of item_stock at this location, kept up to date by stock.py
+
+class ItemStock(Base):
+    # Per-location split of Item.quantity; whatever is not placed at a location is unassigned
+    __tablename__ = "item_stock"
+
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True, index=True)
+    quantity = Column(Integer, default=0)
+
+    __table_args__ = (
+        CheckConstraint("quantity >= 0", name="ck_item_stock_quantity"),
+    )
+
+class ItemForecast(Base):
+    # Latest fitted daily demand per item, rewritten in full by forecasting.py
+    __tablename__ = "item_forecasts"
+
+    item_id = Column(Integer, primary_key=True)  # No foreign key: compaction purges items without touching forecasts
+    method = Column(String)  # ewma | croston
+    daily_demand = Column(Float)
+    demand_days = Column(Integer)  # Days with consumption in the history window
+    history_days = Column(Integer)  # Days of history the fit saw; shorter for new items
+    fitted_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(Base):
+    # Stored responses of write requests, replayed when a client retries with the same Idempotency-Key
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String)  # Hash of method, path, query and body; a reused key must match it
+    status_code = Column(Integer, nullable=True)  # Null while the first request is still running
+    content_type = Column(String, nullable=True)
+    headers = Column(Text, nullable=True)  # JSON object of the response headers a replay repeats (ETag, ...)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
-    item = relationship("Item")
-    category = relationship("Category")
+def upgrade_schema():
+    # create_all only creates missing tables, so add columns and indexes introduced since
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+            # Drop foreign keys the models no longer declare. SQLite cannot drop constraints, but it
+            # only enforces them with PRAGMA foreign_keys=ON, which this app never sets
+            if engine.dialect.name != "sqlite":
+                declared = {key.parent.name for key in table.foreign_keys}
+                for key in inspector.get_foreign_keys(table.name):
+                    if key["name"] and not set(key["constrained_columns"]) <= declared:
+                        conn.execute(text(f"ALTER TABLE {table.name} DROP CONSTRAINT {key['name']}"))
+            existing_indexes = {index["name"]: index for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                found = existing_indexes.get(index.name)
+                # Recreate indexes whose uniqueness changed, e.g. ix_categories_name
+                if found is not None and bool(found["unique"]) != bool(index.unique):
+                    index.drop(conn)
+                    found = None
+                if found is None:
+                    index.create(conn)
 
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
@@ -0,0 +1,127 @@
+# backend/events.py
+import os
+import asyncio
+import threading
+from sqlalchemy import func
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal, Log
+
+HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+REPLAY_BATCH = 500
+
+
+def log_event(log):
+    # Every write goes through create_log, so a Log row is the event and its id the event id
+    return jsonable_encoder({
+        "id": log.id,
+        "type": log.action,
+        "item_id": log.item_id,
+        "category_id": log.category_id,
+        "quantity_change": log.quantity_change,
+        "description": log.description,
+        "timestamp": log.timestamp
+    })
+
+
+class _Subscriber:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; a consumer this far behind is cut off and resumes from the Log table
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBus:
+    """In-process fan-out of change events from the write endpoints (worker threads) to streaming clients."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                # Loop already closed; the stream's finally block will unsubscribe it
+                pass
+
+
+event_bus = EventBus()
+
+
+def replay(after_id, limit=REPLAY_BATCH):
+    db = SessionLocal()
+    try:
+        logs = db.query(Log).filter(Log.id > after_id).order_by(Log.id).limit(limit).all()
+        return [log_event(log) for log in logs]
+    finally:
+        db.close()
+
+
+def latest_event_id():
+    db = SessionLocal()
+    try:
+        return db.query(func.max(Log.id)).scalar() or 0
+    finally:
+        db.close()
+
+
+async def stream(last_event_id=None, bus=event_bus):
+    """Yields events after last_event_id (or from now when None), then live ones.
+
+    Yields None when nothing happened for HEARTBEAT_SECONDS so callers can send a keepalive.
+    Idle periods also re-check the Log table, which picks up writes made by other worker processes.
+    """
+    # Subscribe before reading the Log table so nothing committed in between is missed
+    subscriber = bus.subscribe()
+    try:
+        last = last_event_id if last_event_id is not None else await run_in_threadpool(latest_event_id)
+        catch_up = True
+        while not subscriber.overflowed:
+            if catch_up:
+                while True:
+                    batch = await run_in_threadpool(replay, last)
+                    for event in batch:
+                        last = event["id"]
+                        yield event
+                    if len(batch) < REPLAY_BATCH:
+                        break
+                catch_up = False
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                catch_up = True
+                yield None
+                continue
+            # Already sent during catch-up
+            if event["id"] <= last:
+                continue
+            # Ids were skipped (another worker's writes or commits landing out of order): fill the gap from the Log table
+            if event["id"] > last + 1:
+                catch_up = True
+                continue
+            last = event["id"]
+            yield event
+    finally:
+        bus.unsubscribe(subscriber)
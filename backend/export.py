@@ -0,0 +1,153 @@
+# backend/export.py
+"""Columnar exports of items and logs.
+
+Rows are read from SQL in keyset batches, converted to Arrow record batches and
+written out as each batch arrives, so memory stays flat regardless of table size.
+Repeated strings (log actions, category names) are dictionary-encoded.
+"""
+import os
+import tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database import SessionLocal, Item, Category, Log
+import logstore
+
+BATCH_SIZE = 10000
+STRING_DICT = pa.dictionary(pa.int32(), pa.string())
+
+ITEM_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("name", pa.string()),
+    ("description", pa.string()),
+    ("sku", pa.string()),
+    ("quantity", pa.int64()),
+    ("category_id", pa.int64()),
+    ("category", STRING_DICT),
+    ("created_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us")),
+])
+
+LOG_SCHEMA = logstore.arrow_schema()  # Same layout as the archived months
+
+
+class _Chunks:
+    # Write-only sink the Arrow writers stream into; the response drains it after every batch
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _record_batch(rows, schema):
+    return pa.RecordBatch.from_pydict(
+        {field.name: [row[field.name] for row in rows] for field in schema}, schema=schema
+    )
+
+
+def _item_batches(db):
+    query = (
+        db.query(
+            Item.id, Item.name, Item.description, Item.sku, Item.quantity, Item.category_id,
+            Category.name.label("category"), Item.created_at, Item.updated_at
+        )
+        .outerjoin(Category, Item.category_id == Category.id)
+        .filter(Item.deleted_at.is_(None))
+        .order_by(Item.id)
+    )
+    last_id = 0
+    while True:
+        rows = query.filter(Item.id > last_id).limit(BATCH_SIZE).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield _record_batch([row._asdict() for row in rows], ITEM_SCHEMA)
+
+
+def _log_batches(db, since=None, until=None, include_archived=True, after_id=0, up_to_id=None):
+    # Archived months first: their ids are all older than the table's
+    if include_archived:
+        for table in logstore.archived_tables(since, until):
+            yield from table.to_batches(BATCH_SIZE)
+
+    query = db.query(*[getattr(Log, field.name) for field in LOG_SCHEMA]).order_by(Log.id)
+    if since is not None:
+        query = query.filter(Log.timestamp >= since)
+    if until is not None:
+        query = query.filter(Log.timestamp < until)
+    if up_to_id is not None:
+        query = query.filter(Log.id <= up_to_id)
+    last_id = after_id
+    while True:
+        rows = query.filter(Log.id > last_id).limit(BATCH_SIZE).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield _record_batch([row._asdict() for row in rows], LOG_SCHEMA)
+
+
+def _stream(batches, schema, file_format):
+    sink = _Chunks()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    db = SessionLocal()
+    try:
+        for batch in batches(db):
+            writer.write_batch(batch)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
+
+
+def export_items(file_format):
+    """Yields the live items as Parquet or an Arrow IPC stream, one chunk per batch."""
+    return _stream(_item_batches, ITEM_SCHEMA, file_format)
+
+
+def export_logs(file_format, since=None, until=None):
+    """Yields logs in [since, until), archived months included, as Parquet or an Arrow IPC stream."""
+    return _stream(lambda db: _log_batches(db, since, until), LOG_SCHEMA, file_format)
+
+
+def export_log_table(file_format, after_id=0, up_to_id=None):
+    """Yields only the rows still in the logs table with after_id < id <= up_to_id."""
+    return _stream(
+        lambda db: _log_batches(db, include_archived=False, after_id=after_id, up_to_id=up_to_id),
+        LOG_SCHEMA, file_format
+    )
+
+
+def write_file(chunks, path):
+    # Written next to the target and renamed, so readers never see a partial file. The temporary
+    # name is unique, so concurrent writers of the same path never interleave their bytes
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
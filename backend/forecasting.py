@@ -0,0 +1,150 @@
+# backend/forecasting.py
+"""Per-item demand forecasts from the quantity_change history.
+
+Consumption (negative quantity changes) is bucketed into a dense items x days
+matrix with pandas. Each item is fitted with simple exponential smoothing, or with
+Croston's method (SBA variant) when its demand is intermittent. Both models are
+stepped one day at a time across a whole block of items with NumPy, and blocks are
+fitted in parallel worker processes. Every run replaces the item_forecasts table;
+run it from cron:
+
+    python forecasting.py --history-days 180 --workers 4
+"""
+import os
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, insert, delete
+from database import SessionLocal, Item, Log, ItemForecast
+import logstore
+
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "180"))
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.1"))
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_SIZE = 10000  # Items per worker task
+INTERMITTENT_ADI = 1.32  # Average days between demands above which Croston is used (Syntetos-Boylan)
+
+
+def daily_demand(db, item_ids, start, end):
+    """Units consumed per item per day in [start, end) as an items x days float array."""
+    columns = ["item_id", "timestamp", "quantity_change"]
+    frames = [table.select(columns).to_pandas() for table in logstore.archived_tables(start, end)]
+    frames.append(pd.read_sql(
+        select(Log.item_id, Log.timestamp, Log.quantity_change).where(
+            Log.quantity_change < 0, Log.item_id.isnot(None), Log.timestamp >= start, Log.timestamp < end
+        ),
+        db.connection()
+    ))
+    frames = [frame for frame in frames if not frame.empty]
+    logs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    logs = logs[(logs["quantity_change"] < 0) & logs["item_id"].notna()]
+
+    days = pd.date_range(start, end, freq="D", inclusive="left")
+    if logs.empty:
+        return np.zeros((len(item_ids), len(days)))
+    day = pd.to_datetime(logs["timestamp"]).dt.floor("D")
+    consumed = (-logs["quantity_change"]).groupby([logs["item_id"].astype("int64"), day]).sum()
+    # Days without consumption become explicit zeros; items without any become all-zero rows
+    matrix = consumed.unstack(fill_value=0).reindex(index=item_ids, columns=days, fill_value=0)
+    return matrix.to_numpy(dtype=np.float64)
+
+
+def fit(demand, starts, alpha=FORECAST_ALPHA):
+    """Fits every row of an items x days demand block; days before starts[i] are ignored for item i."""
+    n_items, n_days = demand.shape
+    level = np.zeros(n_items)  # EWMA of daily demand
+    size = np.zeros(n_items)  # Croston: smoothed size of a nonzero demand
+    interval = np.zeros(n_items)  # Croston: smoothed days between demands
+    since_demand = np.ones(n_items)
+    demand_days = np.zeros(n_items, dtype=np.int64)
+
+    for t in range(n_days):
+        d = demand[:, t]
+        active = starts <= t
+        level = np.where(starts == t, d, np.where(active, level + alpha * (d - level), level))
+        hit = active & (d > 0)
+        first = hit & (demand_days == 0)
+        size = np.where(first, d, np.where(hit, size + alpha * (d - size), size))
+        interval = np.where(first, since_demand, np.where(hit, interval + alpha * (since_demand - interval), interval))
+        since_demand = np.where(hit, 1, np.where(active, since_demand + 1, since_demand))
+        demand_days += hit
+
+    history_days = np.clip(n_days - starts, 0, None)
+    intermittent = history_days > INTERMITTENT_ADI * demand_days
+    # Croston only updates on demand days; a gap longer than the smoothed interval is
+    # already evidence of slower demand, so it bounds the interval from below
+    interval = np.maximum(interval, np.where(demand_days > 0, since_demand, 0))
+    croston = np.divide(size, interval, out=np.zeros(n_items), where=interval > 0) * (1 - alpha / 2)
+    return {
+        "method": np.where(intermittent & (demand_days > 0), "croston", "ewma"),
+        "daily_demand": np.where(intermittent, croston, level),
+        "demand_days": demand_days,
+        "history_days": history_days
+    }
+
+
+def _fit_chunk(args):
+    return fit(*args)
+
+
+def run_forecasts(history_days=FORECAST_HISTORY_DAYS, workers=FORECAST_WORKERS, alpha=FORECAST_ALPHA, batch_size=10000):
+    # Whole days only: today is still in progress
+    end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=history_days)
+    db = SessionLocal()
+    try:
+        items = pd.read_sql(
+            select(Item.id, Item.created_at).where(Item.deleted_at.is_(None)).order_by(Item.id), db.connection()
+        )
+        demand = daily_demand(db, items["id"], start, end)
+        # Items created inside the window are only fitted from their first day
+        created = pd.to_datetime(items["created_at"]).dt.floor("D")
+        starts = ((created - start).dt.days.fillna(0)).clip(lower=0).to_numpy(dtype=np.int64)
+
+        chunks = [
+            (demand[i:i + CHUNK_SIZE], starts[i:i + CHUNK_SIZE], alpha) for i in range(0, len(items), CHUNK_SIZE)
+        ]
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_fit_chunk, chunks))
+        else:
+            results = [_fit_chunk(chunk) for chunk in chunks]
+
+        fitted_at = datetime.utcnow()
+        rows = [
+            {
+                "item_id": item_id, "method": str(method), "daily_demand": float(demand_rate),
+                "demand_days": int(days), "history_days": int(history), "fitted_at": fitted_at
+            }
+            for offset, result in zip(range(0, len(items), CHUNK_SIZE), results)
+            for item_id, method, demand_rate, days, history in zip(
+                items["id"].iloc[offset:offset + CHUNK_SIZE].tolist(), result["method"], result["daily_demand"],
+                result["demand_days"], result["history_days"]
+            )
+        ]
+        # One transaction, so readers see either the previous run or this one
+        db.execute(delete(ItemForecast))
+        for i in range(0, len(rows), batch_size):
+            db.execute(insert(ItemForecast), rows[i:i + batch_size])
+        db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit per-item demand forecasts from the log history")
+    parser.add_argument("--history-days", type=int, default=FORECAST_HISTORY_DAYS)
+    parser.add_argument("--workers", type=int, default=FORECAST_WORKERS)
+    parser.add_argument("--alpha", type=float, default=FORECAST_ALPHA)
+    args = parser.parse_args()
+
+    started = datetime.utcnow()
+    fitted = run_forecasts(args.history_days, args.workers, args.alpha)
+    print(f"Fitted {fitted} items in {(datetime.utcnow() - started).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
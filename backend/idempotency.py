@@ -0,0 +1,159 @@
+# backend/idempotency.py
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal, IdempotencyKey
+
+# Stored responses are replayed for this long; a retry after that runs the request again
+IDEMPOTENCY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+# A claim with no response after this long belongs to a request that died; a retry may take it over
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60")))
+# Expired keys are purged at most this often, by whichever write comes along
+PURGE_INTERVAL = timedelta(minutes=5)
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+# Response headers a replay must repeat; the rest (date, content-length, ...) are recomputed
+REPLAYED_HEADERS = ("etag", "location", "content-disposition", "x-next-cursor")
+# Streamed responses can't be stored; requests to these run without idempotency
+STREAMING_PATHS = {"/rfq/analyze"}
+STREAMING_MEDIA_TYPES = ("text/event-stream",)
+
+_last_purge = datetime.min
+
+
+def fingerprint(method: str, path: str, query: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query.encode(), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def claim(key: str, request_fingerprint: str) -> Tuple[str, Optional[tuple]]:
+    """Reserves the key for this request.
+
+    Returns ("new", None) when the caller should run the request, ("replay",
+    (status_code, content_type, headers, body)) when a response is stored, ("busy", None)
+    while another request holds the key, and ("mismatch", None) when the key was
+    used for a different request.
+    """
+    global _last_purge
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        if now - _last_purge > PURGE_INTERVAL:
+            _last_purge = now
+            db.query(IdempotencyKey).filter(IdempotencyKey.created_at < now - IDEMPOTENCY_TTL).delete(
+                synchronize_session=False
+            )
+            db.commit()
+
+        row = db.get(IdempotencyKey, key)
+        if row is not None:
+            expired = row.created_at < now - IDEMPOTENCY_TTL
+            abandoned = row.status_code is None and row.created_at < now - IDEMPOTENCY_LOCK_TIMEOUT
+            if not expired and not abandoned:
+                if row.fingerprint != request_fingerprint:
+                    return "mismatch", None
+                if row.status_code is None:
+                    return "busy", None
+                return "replay", (row.status_code, row.content_type, json.loads(row.headers or "{}"), row.body)
+            # Only the retry that still sees the stale row gets to replace it
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at
+            ).delete(synchronize_session=False)
+
+        # The primary key makes this the lock: of two concurrent first attempts, one insert fails
+        db.add(IdempotencyKey(key=key, fingerprint=request_fingerprint, created_at=now))
+        db.commit()
+        return "new", None
+    except IntegrityError:
+        db.rollback()
+        return "busy", None
+    finally:
+        db.close()
+
+
+def store(key: str, status_code: int, content_type: Optional[str], headers: dict, body: bytes):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+            {"status_code": status_code, "content_type": content_type, "headers": json.dumps(headers), "body": body},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(key: str):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def install(app):
+    """Makes every write endpoint honor the Idempotency-Key header.
+
+    The first request with a key runs normally and its response is stored;
+    retries with the same key get that response back without running the
+    handler again. Server errors are not stored, so a retry after a 5xx runs
+    the request again. Streaming endpoints ignore the header: their responses
+    are never buffered or stored.
+    """
+
+    @app.middleware("http")
+    async def idempotency(request: Request, call_next):
+        key = request.headers.get("Idempotency-Key")
+        if key is None or request.method not in WRITE_METHODS or request.url.path in STREAMING_PATHS:
+            return await call_next(request)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return JSONResponse(status_code=400, content={"detail": "Invalid Idempotency-Key"})
+
+        body = await request.body()
+        request_fingerprint = fingerprint(request.method, request.url.path, request.url.query, body)
+        state, stored = await run_in_threadpool(claim, key, request_fingerprint)
+        if state == "mismatch":
+            return JSONResponse(
+                status_code=422, content={"detail": "Idempotency-Key was already used for a different request"}
+            )
+        if state == "busy":
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still in progress"},
+                headers={"Retry-After": "1"}
+            )
+        if state == "replay":
+            status_code, content_type, headers, content = stored
+            return Response(
+                content=content, status_code=status_code, media_type=content_type,
+                headers={**headers, "Idempotent-Replayed": "true"}
+            )
+
+        try:
+            response = await call_next(request)
+            if response.headers.get("content-type", "").startswith(STREAMING_MEDIA_TYPES):
+                # A stream found at runtime: pass it through unstored, so a retry runs again
+                await run_in_threadpool(release, key)
+                return response
+            content = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            await run_in_threadpool(release, key)
+            raise
+        if response.status_code >= 500:
+            await run_in_threadpool(release, key)
+        else:
+            headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+            await run_in_threadpool(
+                store, key, response.status_code, response.headers.get("content-type"), headers, content
+            )
+        return Response(content=content, status_code=response.status_code, headers=dict(response.headers))
@@ -0,0 +1,335 @@
+# backend/logstore.py
+"""Month-partitioned log storage.
+
+Recent months live in the logs table. Months older than LOG_RETENTION_DAYS are moved
+to one compressed file per month in LOG_ARCHIVE_DIR (Parquet, or gzipped NDJSON), and
+log queries only open the files whose month overlaps the requested time range.
+
+    python logstore.py archive                 # move cold months out of the database
+    python logstore.py list                    # show archived months
+"""
+import os
+import glob
+import gzip
+import json
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from fastapi.encoders import jsonable_encoder
+from database import SessionLocal, Log
+
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", "365"))  # 0 keeps every month in the database
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "log_archive")
+LOG_ARCHIVE_FORMAT = os.getenv("LOG_ARCHIVE_FORMAT", "parquet")  # parquet | ndjson
+COLUMNS = ("id", "action", "item_id", "category_id", "quantity_change", "description", "timestamp")
+EXTENSIONS = {"parquet": "parquet", "ndjson": "ndjson.gz"}
+
+
+def month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def archived_months():
+    """Archived partitions as {month start: path}, oldest first."""
+    months = {}
+    for path in sorted(glob.glob(os.path.join(LOG_ARCHIVE_DIR, "logs-*"))):
+        name = os.path.basename(path)
+        if name.endswith(".tmp"):
+            continue
+        months[datetime.strptime(name[5:12], "%Y-%m")] = path
+    return months
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("action", pa.dictionary(pa.int32(), pa.string())),
+        ("item_id", pa.int64()),
+        ("category_id", pa.int64()),
+        ("quantity_change", pa.int64()),
+        ("description", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+    ])
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = arrow_schema()
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = {name: [getattr(row, name) for row in rows] for name in COLUMNS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _NdjsonWriter:
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(jsonable_encoder({name: getattr(row, name) for name in COLUMNS})) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def archive_month(db, month, archive_format=LOG_ARCHIVE_FORMAT, batch_size=10000):
+    """Copies one month of logs to its archive file, then deletes it from the table. Returns rows removed."""
+    end = next_month(month)
+    in_month = db.query(Log).filter(Log.timestamp >= month, Log.timestamp < end)
+    if month not in archived_months():
+        os.makedirs(LOG_ARCHIVE_DIR, exist_ok=True)
+        path = os.path.join(LOG_ARCHIVE_DIR, f"logs-{month:%Y-%m}.{EXTENSIONS[archive_format]}")
+        writer = _ParquetWriter(f"{path}.tmp") if archive_format == "parquet" else _NdjsonWriter(f"{path}.tmp")
+        last_id = 0
+        try:
+            while True:
+                rows = in_month.filter(Log.id > last_id).order_by(Log.id).limit(batch_size).all()
+                if not rows:
+                    break
+                writer.write(rows)
+                last_id = rows[-1].id
+                db.expunge_all()
+        finally:
+            writer.close()
+        os.replace(f"{path}.tmp", path)
+
+    # The file is complete before anything is deleted, so a rerun after a crash only finishes the deletes.
+    # Timestamps are set by the server, so no new rows can land in a month that is already cold.
+    removed = 0
+    while True:
+        ids = [log_id for (log_id,) in in_month.with_entities(Log.id).limit(batch_size)]
+        if not ids:
+            return removed
+        db.query(Log).filter(Log.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        removed += len(ids)
+
+
+def archive_cold_logs(db, retention_days=LOG_RETENTION_DAYS, archive_format=LOG_ARCHIVE_FORMAT, batch_size=10000):
+    if not retention_days:
+        return {}
+    # Only whole months that ended before the retention cutoff
+    cutoff = month_start(datetime.utcnow() - timedelta(days=retention_days))
+    oldest = db.query(func.min(Log.timestamp)).scalar()
+    archived = {}
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        if db.query(Log.id).filter(Log.timestamp >= month, Log.timestamp < next_month(month)).first():
+            archived[f"{month:%Y-%m}"] = archive_month(db, month, archive_format, batch_size)
+        month = next_month(month)
+    return archived
+
+
+# Filters are (column, op, value) tuples with op one of "=", "in", "not in"; the same
+# list drives the SQL query on the table and the scan of archived months
+def apply_filters(query, filters):
+    for column, op, value in filters:
+        attr = getattr(Log, column)
+        if op == "=":
+            query = query.filter(attr == value)
+        elif op == "in":
+            query = query.filter(attr.in_(value))
+        elif op == "not in":
+            query = query.filter(attr.isnot(None), attr.notin_(value))
+    return query
+
+
+def _matches(row, filters):
+    for column, op, value in filters:
+        if op == "=" and row[column] != value:
+            return False
+        if op == "in" and row[column] not in value:
+            return False
+        if op == "not in" and (row[column] is None or row[column] in value):
+            return False
+    return True
+
+
+def _months_in_range(since=None, until=None, descending=False):
+    months = archived_months()
+    return [
+        months[month] for month in sorted(months, reverse=descending)
+        if (since is None or next_month(month) > since) and (until is None or month < until)
+    ]
+
+
+def _parquet_filters(filters, since=None, until=None, cursor=None, descending=False):
+    dnf = [(column, op, list(value) if op != "=" else value) for column, op, value in filters]
+    if since is not None:
+        dnf.append(("timestamp", ">=", since))
+    if until is not None:
+        dnf.append(("timestamp", "<", until))
+    if cursor is not None:
+        dnf.append(("id", "<" if descending else ">", cursor))
+    return dnf or None
+
+
+def _past_cursor(low, high, cursor, descending):
+    # True when every id in [low, high] is on the far side of the cursor
+    return cursor is not None and (low >= cursor if descending else high <= cursor)
+
+
+def _read_parquet(path, filters, since=None, until=None, cursor=None, limit=None, descending=False):
+    import pyarrow.parquet as pq
+
+    # Archive files are written in id order, so row groups are read in order (reversed when
+    # descending) and reading stops once limit rows matched. The footer's id statistics skip
+    # whole files and row groups on the far side of the cursor without reading them
+    parquet = pq.ParquetFile(path)
+    metadata = parquet.metadata
+    id_column = parquet.schema_arrow.get_field_index("id")
+    groups = range(metadata.num_row_groups)
+    stats = [metadata.row_group(index).column(id_column).statistics for index in groups]
+    if all(stat is not None and stat.has_min_max for stat in stats) and stats and _past_cursor(
+        min(stat.min for stat in stats), max(stat.max for stat in stats), cursor, descending
+    ):
+        return []
+
+    dnf = _parquet_filters(filters, since, until, cursor, descending)
+    expression = pq.filters_to_expression(dnf) if dnf else None
+    rows = []
+    for index in reversed(groups) if descending else groups:
+        stat = stats[index]
+        if stat is not None and stat.has_min_max and _past_cursor(stat.min, stat.max, cursor, descending):
+            continue
+        table = parquet.read_row_group(index)
+        if expression is not None:
+            table = table.filter(expression)
+        found = table.to_pylist()
+        rows.extend(reversed(found) if descending else found)
+        if limit is not None and len(rows) >= limit:
+            return rows[:limit]
+    return rows
+
+
+def _read_ndjson(path, filters):
+    rows = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"]) if row["timestamp"] else None
+            if _matches(row, filters):
+                rows.append(row)
+    return rows
+
+
+def read_archived(filters=(), since=None, until=None, cursor=None, limit=None, descending=False):
+    """Archived log rows ordered by id, newest first when descending, reading only months in [since, until)."""
+    rows = []
+    for path in _months_in_range(since, until, descending):
+        wanted = None if limit is None else limit - len(rows)
+        if path.endswith(".parquet"):
+            rows.extend(_read_parquet(path, filters, since, until, cursor, wanted, descending))
+        else:
+            found = [
+                row for row in _read_ndjson(path, filters)
+                if (since is None or row["timestamp"] >= since)
+                and (until is None or row["timestamp"] < until)
+                and (cursor is None or (row["id"] < cursor if descending else row["id"] > cursor))
+            ]
+            found.sort(key=lambda row: row["id"], reverse=descending)
+            rows.extend(found)
+        if limit is not None and len(rows) >= limit:
+            return rows[:limit]
+    return rows
+
+
+def archived_tables(since=None, until=None):
+    """Archived months overlapping [since, until) as Arrow tables, oldest first."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    for path in _months_in_range(since, until):
+        if path.endswith(".parquet"):
+            yield pq.read_table(path, filters=_parquet_filters([], since, until))
+            continue
+        rows = [
+            row for row in _read_ndjson(path, [])
+            if (since is None or row["timestamp"] >= since) and (until is None or row["timestamp"] < until)
+        ]
+        yield pa.Table.from_pylist(rows, schema=arrow_schema())
+
+
+GROUP_COLUMNS = {"day": "timestamp", "action": "action", "category": "category_id"}
+
+
+def _group_key(group_by, value):
+    if group_by == "day":
+        return value.strftime("%Y-%m-%d") if value else None
+    return value
+
+
+def aggregate_archived(filters=(), since=None, until=None, group_by="day"):
+    """{group key: [count, summed quantity_change]} over the archived months in [since, until)."""
+    totals = defaultdict(lambda: [0, 0])
+    column = GROUP_COLUMNS[group_by]
+    for path in _months_in_range(since, until):
+        if not path.endswith(".parquet"):
+            for row in _read_ndjson(path, filters):
+                if (since is None or row["timestamp"] >= since) and (until is None or row["timestamp"] < until):
+                    total = totals[_group_key(group_by, row[column])]
+                    total[0] += 1
+                    total[1] += row["quantity_change"] or 0
+            continue
+
+        # Parquet months are aggregated column-wise without materializing rows
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=[column, "quantity_change"], filters=_parquet_filters(filters, since, until))
+        keys = table[column]
+        if group_by == "day":
+            keys = pc.strftime(keys, format="%Y-%m-%d")
+        elif group_by == "action":
+            keys = pc.cast(keys, pa.string())
+        grouped = pa.table({"key": keys, "quantity_change": table["quantity_change"]}).group_by("key").aggregate(
+            [([], "count_all"), ("quantity_change", "sum")]
+        )
+        for key, count, quantity in zip(*(grouped[name].to_pylist() for name in ("key", "count_all", "quantity_change_sum"))):
+            total = totals[key]
+            total[0] += count
+            total[1] += quantity or 0
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive cold log months out of the database")
+    parser.add_argument("command", choices=["archive", "list"])
+    parser.add_argument("--retention-days", type=float, default=LOG_RETENTION_DAYS)
+    parser.add_argument("--format", choices=sorted(EXTENSIONS), default=LOG_ARCHIVE_FORMAT)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for month, path in archived_months().items():
+            print(f"{month:%Y-%m}  {path}  {os.path.getsize(path)} bytes")
+        return
+
+    db = SessionLocal()
+    try:
+        archived = archive_cold_logs(db, args.retention_days, args.format, args.batch_size)
+    finally:
+        db.close()
+    for month, removed in archived.items():
+        print(f"{month}: moved {removed} rows")
+
+
+if __name__ == "__main__":
+    main()
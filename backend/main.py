@@ -1,15 +1,76 @@
 # backend/main.py
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Path, Body, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import List
+from sqlalchemy import func, update, select, case
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import sessionmaker
 from alembic.config import Config
 from alembic import command
-from database import engine, SessionLocal, Item, Category, Log, Base
+from database import engine, SessionLocal, Item, Category, Log, LowStockAlert, ItemForecast, Location, ItemStock, Base
 from util import dict_to_text_description
-from datetime import datetime
+from compaction import TOMBSTONE_RETENTION
+from matching import inventory_index, match_rfq_items
+from similarity import embed, get_vector_index, vector_index
+from throttle import SingleFlight, client_key, create_rate_limiter
+import alerts
+import analytics
+import events
+import export
+import idempotency
+import logstore
+import metrics
+import profiling
+import stock
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
 
 app = FastAPI()
+logger = logging.getLogger("inventory")
+
+# How far each /sync cursor trails the server clock, so writes committed late with an
+# earlier updated_at are sent again on the next sync instead of being skipped
+SYNC_OVERLAP = timedelta(seconds=float(os.getenv("SYNC_OVERLAP_SECONDS", "5")))
+
+# Opt-in SQL profiling; has to be installed before the routes below are declared
+if profiling.PROFILING_ENABLED:
+    profiling.install(app, engine)
+
+# Concurrent identical hot reads share one query
+read_coalescer = SingleFlight()
+rate_limiter = create_rate_limiter()
+
+# Retried writes that carry an Idempotency-Key get the stored response instead of running twice.
+# Installed before the rate limiter so the limiter wraps it and 429s are never stored
+idempotency.install(app)
+
+# Opt-in per-client token bucket, keyed by peer address; X-Client-Id only counts from trusted proxies
+if rate_limiter is not None:
+    @app.middleware("http")
+    async def rate_limit(request: Request, call_next):
+        client = client_key(request.client.host if request.client else None, request.headers.get("X-Client-Id"))
+        if rate_limiter.blocking:
+            allowed, retry_after = await run_in_threadpool(rate_limiter.consume, client)
+        else:
+            allowed, retry_after = rate_limiter.consume(client)
+        if not allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(max(1, round(retry_after)))}
+            )
+        return await call_next(request)
+
+# Prometheus-style /metrics, installed last so it also times rate-limited requests
+if metrics.METRICS_ENABLED:
+    metrics.install(app, engine)
 
 # Dependency to get DB session
 def get_db():
@@ -29,6 +90,16 @@ def get_db():
 # async def startup_event():
 #     run_migrations()
 
+# Persist the vector index so the next start only catches up on changed rows
+@app.on_event("shutdown")
+def save_vector_index():
+    if vector_index.built:
+        db = SessionLocal()
+        try:
+            vector_index.save(db)
+        finally:
+            db.close()
+
 # Function to create a log entry
 def create_log(action, item_id=None, category_id=None, quantity_change=None, description=None, db=None):
     log_entry = Log(
@@ -40,6 +111,174 @@ def create_log(action, item_id=None, category_id=None, quantity_change=None, des
     )
     db.add(log_entry)
     db.commit()
+    events.event_bus.publish(events.log_event(log_entry))
+
+# Re-evaluate low-stock state for the touched items; changes go out on the change feed
+def check_low_stock(db, item_ids):
+    try:
+        raised, cleared = alerts.evaluate_items(db, item_ids)
+        db.commit()
+    except SQLAlchemyError:
+        # The write that called us is already committed; the item's next write evaluates it again
+        db.rollback()
+        logger.exception("Low-stock evaluation failed for items %s", item_ids)
+        return
+    for alert in raised:
+        create_log(
+            action="low_stock",
+            item_id=alert["item_id"],
+            category_id=alert["category_id"],
+            description=f"Low stock: {alert['name']} has {alert['quantity']} left (reorder level {alert['reorder_level']})",
+            db=db
+        )
+    for alert in cleared:
+        create_log(
+            action="low_stock_cleared",
+            item_id=alert["item_id"],
+            category_id=alert["category_id"],
+            description=f"Low stock cleared: {alert['name']} has {alert['quantity']}",
+            db=db
+        )
+
+# Keep the in-memory search indexes in sync with item writes
+def index_item(item_id, name, description):
+    inventory_index.upsert(item_id, name, description)
+    vector_index.upsert(item_id, name, description)
+
+def unindex_item(item_id):
+    inventory_index.remove(item_id)
+    vector_index.remove(item_id)
+
+def parse_fields(fields, model):
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in model.__table__.columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")  # the cursor needs the id
+    return names
+
+# Keyset pagination on the primary key with optional column projection.
+# Returns (rows, next_cursor); next_cursor is None on the last page.
+def paginate(query, model, cursor=None, limit=None, fields=None, descending=False, skip=0):
+    if fields:
+        query = query.with_entities(*[getattr(model, name) for name in parse_fields(fields, model)])
+
+    if cursor is not None:
+        query = query.filter(model.id < cursor if descending else model.id > cursor)
+    query = query.order_by(model.id.desc() if descending else model.id).offset(skip)
+    if limit is None:
+        rows = query.all()
+        next_cursor = None
+    else:
+        # One extra row tells us whether another page exists without a COUNT
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1].id
+
+    if fields:
+        rows = [row._asdict() for row in rows]
+    return rows, next_cursor
+
+# Timestamps are stored as naive UTC; query params like ?since=...Z arrive timezone-aware
+def utc_naive(value):
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+# Log pages span the logs table and the archived months. Archived ids are all older than the
+# table's, so ascending pages read the archive first and descending pages read it last.
+# archive_filters replaces filters for the archived months when a filter value is a SQL subquery
+def paginate_logs(
+    db, filters, cursor=None, limit=None, fields=None, descending=False, since=None, until=None, archive_filters=None
+):
+    names = parse_fields(fields, Log) if fields else None
+    since, until = utc_naive(since), utc_naive(until)
+    query = logstore.apply_filters(db.query(Log), filters)
+    if since is not None:
+        query = query.filter(Log.timestamp >= since)
+    if until is not None:
+        query = query.filter(Log.timestamp < until)
+
+    def archived(cursor, limit):
+        rows = logstore.read_archived(
+            filters if archive_filters is None else archive_filters, since, until, cursor, limit, descending
+        )
+        return [{name: row[name] for name in names} for row in rows] if names else rows
+
+    if descending:
+        rows, next_cursor = paginate(query, Log, cursor, limit, fields, descending=True)
+        if next_cursor is not None:
+            return rows, next_cursor
+        if limit is None:
+            return rows + archived(cursor, None), None
+        remaining = limit - len(rows)
+        older = archived(cursor, remaining + 1)
+        if len(older) <= remaining:
+            return rows + older, None
+        page = rows + older[:remaining]
+        last = page[-1]
+        return page, last["id"] if isinstance(last, dict) else last.id
+
+    # Only pages starting below the lowest live id can reach archived rows
+    lowest = db.query(func.min(Log.id)).scalar()
+    older = archived(cursor, limit) if cursor is None or lowest is None or cursor < lowest else []
+    if older:
+        cursor = older[-1]["id"]
+    if limit is not None and len(older) == limit:
+        # A full page leaves the rest to the next request, which may find nothing further
+        return older, cursor
+    rows, next_cursor = paginate(query, Log, cursor, None if limit is None else limit - len(older), fields)
+    return older + rows, next_cursor
+
+def set_next_cursor(response, next_cursor):
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+# SKUs are unique among live items (uq_items_live_sku). Checked up front for a clear error; the
+# index still decides when two requests race, and only its violation is reported as a SKU conflict
+def sku_in_use(db, sku, item_id=None):
+    query = db.query(Item.id).filter(Item.sku == sku, Item.deleted_at.is_(None))
+    if item_id is not None:
+        query = query.filter(Item.id != item_id)
+    return query.first() is not None
+
+def is_sku_conflict(error):
+    # PostgreSQL names the index; SQLite only names the column
+    message = str(error.orig)
+    return "uq_items_live_sku" in message or "items.sku" in message
+
+# Optimistic concurrency: the ETag is the row version. If-Match is checked against the version
+# read here, and the versioned UPDATE rejects anyone who committed between that read and ours
+def etag(version):
+    return f'"{version}"'
+
+def check_if_match(if_match, version):
+    if if_match is None or if_match.strip() == "*":
+        return
+    if etag(version) not in [tag.strip().removeprefix("W/") for tag in if_match.split(",")]:
+        raise HTTPException(status_code=409, detail="Modified by someone else; reload and try again")
+
+# Load full item rows for ranked ids, preserving the ranking
+def items_with_scores(db, ranked):
+    if not ranked:
+        return []
+    items = db.query(Item).filter(Item.id.in_([item_id for item_id, _ in ranked]), Item.deleted_at.is_(None)).all()
+    by_id = {item.id: item for item in items}
+    return [
+        {
+            "id": item.id,
+            "name": item.name,
+            "description": item.description,
+            "quantity": item.quantity,
+            "category_id": item.category_id,
+            "score": round(score, 4)
+        }
+        for item_id, score in ranked
+        if (item := by_id.get(item_id)) is not None
+    ]
 
 
 @app.post("/categories/")
@@ -67,26 +306,40 @@ def create_category(name: str, db: Session = Depends(get_db)):
 @app.get("/categories/")
 def read_categories(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
     try:
-        categories = db.query(Category).offset(skip).limit(limit).all()
-        return categories
+        # Encoded inside the shared call so waiting requests never touch the leader's session
+        return read_coalescer.do(
+            ("categories", skip, limit),
+            lambda: jsonable_encoder(
+                db.query(Category).filter(Category.deleted_at.is_(None)).offset(skip).limit(limit).all()
+            )
+        )
     except SQLAlchemyError as e:
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
     
 @app.get("/categories/{category_id}")
-def read_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id).first()
+def read_category(category_id: int, response: Response, db: Session = Depends(get_db)):
+    category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
+    response.headers["ETag"] = etag(category.version)
     return category
 
 # update category name
 @app.put("/categories/{category_id}")
-def update_category(category_id: int, name: str, description: str, db: Session = Depends(get_db)):
+def update_category(
+    category_id: int,
+    name: str,
+    description: str,
+    response: Response,
+    if_match: str = Header(None),
+    db: Session = Depends(get_db)
+):
     try:
-        category = db.query(Category).filter(Category.id == category_id).first()
+        category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
         if category is None:
             raise HTTPException(status_code=404, detail="Category not found")
+        check_if_match(if_match, category.version)
         changes = {}
         old_name = category.name
         
@@ -109,7 +362,11 @@ def update_category(category_id: int, name: str, description: str, db: Session =
             db=db
         )
 
+        response.headers["ETag"] = etag(category.version)
         return category
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Modified by someone else; reload and try again")
     except SQLAlchemyError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error updating category")
@@ -117,12 +374,23 @@ def update_category(category_id: int, name: str, description: str, db: Session =
 # DELETE a category
 @app.delete("/categories/{category_id}")
 def delete_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
     print("attempting to delete category")
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Log the category deletion
+
+    # Soft delete the category and, in one set-based UPDATE, every live item in it
+    deleted_at = datetime.utcnow()
+    db_category.deleted_at = deleted_at
+    item_ids = db.execute(
+        update(Item)
+        .where(Item.category_id == category_id, Item.deleted_at.is_(None))
+        .values(deleted_at=deleted_at)
+        .returning(Item.id)
+    ).scalars().all()
+    stock.release(db, item_ids)
+
+    # Log the category deletion; create_log commits the soft delete with it
     msg = f"Deleted Category: {db_category.name}"
     create_log(
         action="delete_category",
@@ -130,20 +398,26 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
         description=msg,
         db=db
     )
-    
-    # Delete the category
-    db.delete(db_category)
-    db.commit()
+    for item_id in item_ids:
+        unindex_item(item_id)
+    check_low_stock(db, item_ids)
     
     return {"message": "Category deleted"}
 
 @app.post("/items/")
-def create_item(name: str, description: str, category_id: int, quantity: int, db: Session = Depends(get_db)):
+def create_item(name: str, description: str, category_id: int, quantity: int, sku: str = None, db: Session = Depends(get_db)):
+    # Ensure category exists; items in a deleted category would never show up or sync
+    category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if sku and sku_in_use(db, sku):
+        raise HTTPException(status_code=409, detail="SKU is already used by another item")
     try:
-        db_item = Item(name=name, description=description, category_id=category_id, quantity=quantity)
+        db_item = Item(name=name, description=description, category_id=category_id, quantity=quantity, sku=sku or None)
         db.add(db_item)
         db.commit()
         db.refresh(db_item)
+        index_item(db_item.id, name, description)
 
         # Log the item creation
         msg = f"Created Item: {name}, Quantity: {quantity}"
@@ -154,26 +428,40 @@ def create_item(name: str, description: str, category_id: int, quantity: int, db
             description=msg, 
             db=db
         )
-
-        return db_item
+    except IntegrityError as e:
+        db.rollback()
+        if is_sku_conflict(e):
+            raise HTTPException(status_code=409, detail="SKU is already used by another item")
+        raise HTTPException(status_code=400, detail="Error creating item")
     except SQLAlchemyError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error creating item")
 
+    check_low_stock(db, [db_item.id])
+    return db_item
+
 
 @app.put("/items/{item_id}")
 def update_item(
     item_id: int,
+    response: Response,
     name: str = None,
     description: str = None,
     quantity: int = None,
     category_id: int = None,
+    sku: str = None,
+    if_match: str = Header(None),
     db: Session = Depends(get_db)
 ):
     # Fetch the item to be updated
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
+    check_if_match(if_match, item.version)
+    if quantity is not None and quantity != item.quantity:
+        # Taken before any change is flushed; it keeps a concurrent transfer from placing more units
+        # at locations between the allocation check below and our commit
+        stock.lock_item(db, item_id)
 
     # Variables to track changes for logging
     changes = {}
@@ -187,21 +475,32 @@ def update_item(
         changes['description'] = {'old': item.description, 'new': description}
         item.description = description
     if quantity is not None and quantity != item.quantity:
+        # Units placed at locations can only leave through the per-location endpoints
+        if quantity < stock.allocated(db, item_id):
+            raise HTTPException(status_code=400, detail="Quantity is below the stock held at locations")
         quantity_change = quantity - item.quantity  # Log the quantity change
         changes['quantity'] = {'old': item.quantity, 'new': quantity}
         item.quantity = quantity
     if category_id is not None and category_id != item.category_id:
         # Ensure category exists
-        category = db.query(Category).filter(Category.id == category_id).first()
+        category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
         changes['category_id'] = {'old': item.category_id, 'new': category_id}
         item.category_id = category_id
+    # An empty sku clears the code
+    if sku is not None and (sku or None) != item.sku:
+        if sku and sku_in_use(db, sku, item_id):
+            raise HTTPException(status_code=409, detail="SKU is already used by another item")
+        changes['sku'] = {'old': item.sku, 'new': sku or None}
+        item.sku = sku or None
 
     # Commit the updates to the database
     try:
         db.commit()
         db.refresh(item)
+        if 'name' in changes or 'description' in changes:
+            index_item(item.id, item.name, item.description)
         
         # Log changes if any fields were updated
         if changes:
@@ -213,65 +512,130 @@ def update_item(
                 description=dict_to_text_description(changes), 
                 db=db
             )
-            print("Log Created")
-            print(changes)
         
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Modified by someone else; reload and try again")
+    except IntegrityError as e:
+        db.rollback()
+        if is_sku_conflict(e):
+            raise HTTPException(status_code=409, detail="SKU is already used by another item")
+        raise HTTPException(status_code=400, detail="Error updating item")
     except SQLAlchemyError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error updating item")
 
+    if 'quantity' in changes or 'category_id' in changes:
+        check_low_stock(db, [item.id])
+    response.headers["ETag"] = etag(item.version)
     return item
 
 # DELETE an item
 @app.delete("/items/{item_id}")
 def delete_item(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Item).filter(Item.id == item_id).first()
-    category_id = db_item.category_id
+    db_item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    # Log the item deletion
+
+    # Soft delete; the row stays as a tombstone for /sync until compaction purges it
+    db_item.deleted_at = datetime.utcnow()
+    stock.release(db, [item_id])
+
+    # Log the item deletion; create_log commits the soft delete with it
     msg = f"Deleted Item: {db_item.name}"
     create_log(
         action="delete_item",
         item_id=item_id,
-        category_id=category_id,
+        category_id=db_item.category_id,
         description=msg,
         db=db
     )
-    
-    # Delete the item
-    db.delete(db_item)
-    db.commit()
+    unindex_item(item_id)
+    check_low_stock(db, [item_id])
     
     return {"message": "Item deleted"}
 
 @app.get("/items/{item_id}")
-def read_item(item_id: int, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
+def read_item(item_id: int, response: Response, db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
     if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = etag(item.version)
+    return item_detail(item)
+
+def item_detail(item):
     return {
         "id": item.id,
         "name": item.name,
         "description": item.description,
         "quantity": item.quantity,
         "category_id": item.category_id,
+        "sku": item.sku,
         "created_at": item.created_at,
-        "updated_at": item.updated_at
+        "updated_at": item.updated_at,
+        "version": item.version
+    }
+
+# Scanner lookup; served by the unique index on live items' codes
+@app.get("/items/by-code/{code}")
+def read_item_by_code(code: str, response: Response, db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.sku == code, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="No item with this code")
+    response.headers["ETag"] = etag(item.version)
+    return item_detail(item)
+
+# Demand forecast fitted by the forecasting.py batch job, projected over the next `days`
+@app.get("/items/{item_id}/forecast")
+def read_item_forecast(item_id: int, days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    forecast = db.query(ItemForecast).filter(ItemForecast.item_id == item_id).first()
+    if forecast is None:
+        raise HTTPException(status_code=404, detail="No forecast for this item yet")
+
+    days_of_cover = item.quantity / forecast.daily_demand if forecast.daily_demand > 0 else None
+    return {
+        "item_id": item.id,
+        "quantity": item.quantity,
+        "method": forecast.method,
+        "daily_demand": round(forecast.daily_demand, 3),
+        "horizon_days": days,
+        "expected_demand": round(forecast.daily_demand * days, 1),
+        "days_of_cover": round(days_of_cover, 1) if days_of_cover is not None else None,
+        "stockout_date": (datetime.utcnow() + timedelta(days=days_of_cover)).date() if days_of_cover is not None else None,
+        "demand_days": forecast.demand_days,
+        "history_days": forecast.history_days,
+        "fitted_at": forecast.fitted_at
     }
 
 
 @app.get("/items/")
-def read_items(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    items = db.query(Item).offset(skip).limit(limit).all()
+def read_items(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: int = None,
+    fields: str = None,
+    db: Session = Depends(get_db)
+):
+    def load():
+        rows, next_cursor = paginate(
+            db.query(Item).filter(Item.deleted_at.is_(None)), Item, cursor, limit, fields, skip=skip
+        )
+        return jsonable_encoder(rows), next_cursor
+
+    items, next_cursor = read_coalescer.do(("items", skip, limit, cursor, fields), load)
+    set_next_cursor(response, next_cursor)
     return items
 
 @app.get("/search/")
 def search_items(query: str = Query(..., min_length=1), db: Session = Depends(get_db)):
     try:
         items = db.query(Item).filter(
-            Item.name.contains(query) | Item.description.contains(query)
+            Item.name.contains(query) | Item.description.contains(query),
+            Item.deleted_at.is_(None)
         ).all()
         if not items:
             raise HTTPException(status_code=404, detail="No items found")
@@ -279,29 +643,555 @@ def search_items(query: str = Query(..., min_length=1), db: Session = Depends(ge
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/items/{item_id}/similar")
+def read_similar_items(item_id: int, k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    index = get_vector_index(db)
+    vector = index.vector_for(item_id)
+    if vector is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return items_with_scores(db, index.search(vector, k=k, exclude=item_id))
+
+@app.get("/search/semantic")
+def semantic_search(q: str = Query(..., min_length=1), k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    try:
+        ranked = get_vector_index(db).search(embed(q), k=k)
+        return items_with_scores(db, ranked)
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# List endpoints below return one page (100 rows unless a limit is given); pages
+# continue from the X-Next-Cursor response header. Log endpoints also take since/until and
+# only read archived months inside that range
 @app.get("/categories/{category_id}/items/")
-def read_items_by_category(category_id: int, db: Session = Depends(get_db)):
-    items = db.query(Item).filter(Item.category_id == category_id).all()
+def read_items_by_category(
+    category_id: int,
+    response: Response,
+    cursor: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: str = None,
+    db: Session = Depends(get_db)
+):
+    items, next_cursor = paginate(
+        db.query(Item).filter(Item.category_id == category_id, Item.deleted_at.is_(None)), Item, cursor, limit, fields
+    )
     if not items:
         raise HTTPException(status_code=404, detail="No items found for this category")
+    set_next_cursor(response, next_cursor)
     return items
 
 
 @app.get("/categories/{category_id}/logs/")
-def get_logs_by_category(category_id: int, db: Session = Depends(get_db)):
+def get_logs_by_category(
+    category_id: int,
+    response: Response,
+    cursor: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: str = None,
+    newest_first: bool = False,
+    since: datetime = None,
+    until: datetime = None,
+    db: Session = Depends(get_db)
+):
     try:
-        logs = db.query(Log).filter(Log.category_id == category_id).all()
+        logs, next_cursor = paginate_logs(
+            db, [("category_id", "=", category_id)], cursor, limit, fields, newest_first, since, until
+        )
         if not logs:
             raise HTTPException(status_code=404, detail="No logs found for this category.")
+        set_next_cursor(response, next_cursor)
         return logs
     except SQLAlchemyError:
         raise HTTPException(status_code=400, detail="Error fetching logs for the category")
 
-# Fetch logs, including those of deleted categories
+# Fetch logs of deleted categories: soft-deleted ones, and older hard-deleted ones whose row is gone
 @app.get("/logs/deleted_categories")
-def read_logs_of_deleted_categories(db: Session = Depends(get_db)):
+def read_logs_of_deleted_categories(
+    response: Response,
+    cursor: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: str = None,
+    newest_first: bool = False,
+    since: datetime = None,
+    until: datetime = None,
+    db: Session = Depends(get_db)
+):
     try:
-        logs_of_deleted_categories = db.query(Log).filter(Log.action == "delete_category").all()
+        # The table is filtered with a NOT IN subquery; only the archived months need the ids in Python
+        live_categories = select(Category.id).where(Category.deleted_at.is_(None))
+        logs_of_deleted_categories, next_cursor = paginate_logs(
+            db, [("category_id", "not in", live_categories)], cursor, limit, fields, newest_first, since, until,
+            archive_filters=[("category_id", "not in", set(db.scalars(live_categories)))]
+        )
+        set_next_cursor(response, next_cursor)
         return logs_of_deleted_categories
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=500, detail="Failed to fetch logs of deleted categories")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch logs of deleted categories")
+
+def log_filters(action=None, item_id=None, category_id=None):
+    filters = []
+    if action:
+        filters.append(("action", "in", [name.strip() for name in action.split(",") if name.strip()]))
+    if item_id is not None:
+        filters.append(("item_id", "=", item_id))
+    if category_id is not None:
+        filters.append(("category_id", "=", category_id))
+    return filters
+
+# Query logs across the table and archived months; action takes a comma separated list
+@app.get("/logs")
+def read_logs(
+    response: Response,
+    since: datetime = None,
+    until: datetime = None,
+    action: str = None,
+    item_id: int = None,
+    category_id: int = None,
+    cursor: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: str = None,
+    newest_first: bool = False,
+    db: Session = Depends(get_db)
+):
+    try:
+        logs, next_cursor = paginate_logs(
+            db, log_filters(action, item_id, category_id), cursor, limit, fields, newest_first, since, until
+        )
+        set_next_cursor(response, next_cursor)
+        return logs
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Failed to fetch logs")
+
+# Counts and summed quantity_change per day, action or category, grouped in SQL
+# (and column-wise over archived months) so charts never pull raw log rows
+@app.get("/logs/aggregate")
+def aggregate_logs(
+    group_by: str = Query(..., pattern="^(day|action|category)$"),
+    since: datetime = None,
+    until: datetime = None,
+    action: str = None,
+    item_id: int = None,
+    category_id: int = None,
+    db: Session = Depends(get_db)
+):
+    since, until = utc_naive(since), utc_naive(until)
+    try:
+        filters = log_filters(action, item_id, category_id)
+        key = {"day": func.date(Log.timestamp), "action": Log.action, "category": Log.category_id}[group_by]
+        query = logstore.apply_filters(
+            db.query(key, func.count(Log.id), func.coalesce(func.sum(Log.quantity_change), 0)), filters
+        )
+        if since is not None:
+            query = query.filter(Log.timestamp >= since)
+        if until is not None:
+            query = query.filter(Log.timestamp < until)
+
+        totals = logstore.aggregate_archived(filters, since, until, group_by)
+        for group, count, quantity_change in query.group_by(key):
+            # Postgres returns a date for date(); SQLite already returns the string
+            group = str(group) if group_by == "day" and group is not None else group
+            totals[group][0] += count
+            totals[group][1] += quantity_change
+        return [
+            {group_by: group, "count": count, "quantity_change": quantity_change}
+            for group, (count, quantity_change) in sorted(totals.items(), key=lambda entry: (entry[0] is None, entry[0]))
+        ]
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Failed to aggregate logs")
+
+# Columnar exports for analysis: Parquet files, or Arrow IPC streams that load
+# straight into pyarrow/pandas (pyarrow.ipc.open_stream(...).read_pandas())
+EXPORT_MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream"}
+
+def export_response(chunks, filename, file_format):
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/export/items.{file_format}")
+def export_items(file_format: str = Path(..., pattern="^(parquet|arrow)$")):
+    return export_response(export.export_items(file_format), f"items.{file_format}", file_format)
+
+@app.get("/export/logs.{file_format}")
+def export_logs(file_format: str = Path(..., pattern="^(parquet|arrow)$"), since: datetime = None, until: datetime = None):
+    since, until = utc_naive(since), utc_naive(until)
+    return export_response(export.export_logs(file_format, since, until), f"logs.{file_format}", file_format)
+
+# Reporting runs on DuckDB over Parquet snapshots and its own thread pool, away from the OLTP pool
+@app.get("/analytics/stock-by-category")
+async def analytics_stock_by_category():
+    return await analytics.analytics_store.run(analytics.stock_by_category)
+
+@app.get("/analytics/stock-over-time")
+async def analytics_stock_over_time(days: int = Query(90, ge=1, le=3650), category_id: int = None):
+    return await analytics.analytics_store.run(analytics.stock_over_time, days, category_id)
+
+@app.get("/analytics/velocity")
+async def analytics_velocity(days: int = Query(30, ge=1, le=3650), limit: int = Query(50, ge=1, le=1000)):
+    return await analytics.analytics_store.run(analytics.movement_velocity, days, limit)
+
+@app.get("/analytics/status")
+async def analytics_status():
+    return await analytics.analytics_store.run(analytics.status)
+
+# Reorder levels: an item's own level overrides its category's; omit reorder_level to clear it
+@app.put("/items/{item_id}/reorder-level")
+def set_item_reorder_level(item_id: int, reorder_level: int = Query(None, ge=0), db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    try:
+        item.reorder_level = reorder_level
+        db.commit()
+        check_low_stock(db, [item_id])
+        return {"item_id": item_id, "reorder_level": reorder_level}
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error updating reorder level")
+
+@app.put("/categories/{category_id}/reorder-level")
+def set_category_reorder_level(category_id: int, reorder_level: int = Query(None, ge=0), db: Session = Depends(get_db)):
+    category = db.query(Category).filter(Category.id == category_id, Category.deleted_at.is_(None)).first()
+    if category is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    try:
+        category.reorder_level = reorder_level
+        db.commit()
+        # Only items that inherit the category level can change state
+        item_ids = [
+            item_id for (item_id,) in db.query(Item.id).filter(
+                Item.category_id == category_id, Item.deleted_at.is_(None), Item.reorder_level.is_(None)
+            )
+        ]
+        check_low_stock(db, item_ids)
+        return {"category_id": category_id, "reorder_level": reorder_level, "items_evaluated": len(item_ids)}
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error updating reorder level")
+
+# Items at or below their reorder level, most depleted first; served from the maintained alert table
+@app.get("/alerts/low-stock")
+def read_low_stock_alerts(category_id: int = None, limit: int = Query(None, ge=1, le=1000), db: Session = Depends(get_db)):
+    try:
+        query = db.query(
+            LowStockAlert.item_id, Item.name, LowStockAlert.category_id, LowStockAlert.quantity,
+            LowStockAlert.reorder_level, LowStockAlert.triggered_at
+        ).join(Item, Item.id == LowStockAlert.item_id)
+        if category_id is not None:
+            query = query.filter(LowStockAlert.category_id == category_id)
+        query = query.order_by(
+            (LowStockAlert.quantity * 1.0 / func.nullif(LowStockAlert.reorder_level, 0)).asc(), LowStockAlert.item_id
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return [row._asdict() for row in query]
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Failed to fetch low stock alerts")
+
+# Stores and warehouses; each keeps a running total of the stock it holds
+@app.post("/locations/")
+def create_location(name: str, db: Session = Depends(get_db)):
+    try:
+        location = Location(name=name, total_quantity=0)
+        db.add(location)
+        db.commit()
+        db.refresh(location)
+        return location
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error creating location")
+
+@app.get("/locations/")
+def read_locations(db: Session = Depends(get_db)):
+    return db.query(Location).order_by(Location.id).all()
+
+@app.get("/locations/{location_id}/stock")
+def read_location_stock(
+    location_id: int,
+    response: Response,
+    cursor: int = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    if db.query(Location.id).filter(Location.id == location_id).first() is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    query = (
+        db.query(ItemStock.item_id, Item.name, ItemStock.quantity)
+        .join(Item, Item.id == ItemStock.item_id)
+        .filter(ItemStock.location_id == location_id, ItemStock.quantity > 0)
+        .order_by(ItemStock.item_id)
+    )
+    if cursor is not None:
+        query = query.filter(ItemStock.item_id > cursor)
+    rows = [row._asdict() for row in query.limit(limit + 1)]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, rows[-1]["item_id"])
+    return rows
+
+@app.get("/items/{item_id}/stock")
+def read_item_stock(item_id: int, db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    locations = [
+        row._asdict() for row in
+        db.query(ItemStock.location_id, Location.name, ItemStock.quantity)
+        .join(Location, Location.id == ItemStock.location_id)
+        .filter(ItemStock.item_id == item_id, ItemStock.quantity > 0)
+        .order_by(ItemStock.location_id)
+    ]
+    return {
+        "item_id": item.id,
+        "quantity": item.quantity,
+        "unassigned": item.quantity - sum(location["quantity"] for location in locations),
+        "locations": locations
+    }
+
+# Stock received (positive) or used up (negative) at one location; the item's total moves with it
+@app.post("/items/{item_id}/stock/{location_id}")
+def adjust_item_stock(item_id: int, location_id: int, quantity_change: int, db: Session = Depends(get_db)):
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    location = db.query(Location).filter(Location.id == location_id).first()
+    if location is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    try:
+        stock.adjust(db, item_id, location_id, quantity_change)
+        create_log(
+            action="update_stock",
+            item_id=item_id,
+            category_id=item.category_id,
+            quantity_change=quantity_change,
+            description=f"Stock of {item.name} at {location.name} changed by {quantity_change}",
+            db=db
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error updating stock")
+    check_low_stock(db, [item_id])
+    return read_item_stock(item_id, db)
+
+# Moves stock between locations without changing the item's total; omit a side to use the unassigned stock
+@app.post("/transfers/")
+def transfer_stock(
+    item_id: int,
+    quantity: int = Query(..., gt=0),
+    from_location_id: int = None,
+    to_location_id: int = None,
+    db: Session = Depends(get_db)
+):
+    if from_location_id == to_location_id:
+        raise HTTPException(status_code=400, detail="Source and destination must differ")
+    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    names = {}
+    for location_id in (from_location_id, to_location_id):
+        if location_id is None:
+            names[location_id] = "unassigned"
+            continue
+        location = db.query(Location).filter(Location.id == location_id).first()
+        if location is None:
+            raise HTTPException(status_code=404, detail="Location not found")
+        names[location_id] = location.name
+    try:
+        stock.transfer(db, item_id, from_location_id, to_location_id, quantity)
+        create_log(
+            action="transfer_stock",
+            item_id=item_id,
+            category_id=item.category_id,
+            description=f"Moved {quantity} of {item.name} from {names[from_location_id]} to {names[to_location_id]}",
+            db=db
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error transferring stock")
+    return read_item_stock(item_id, db)
+
+class ScanLine(BaseModel):
+    code: str
+    quantity_change: int
+
+# A handheld session's scans applied in one transaction: codes are resolved with a single IN lookup
+# and every quantity moves in one UPDATE. Nothing is applied if a code is unknown or stock would run out
+@app.post("/scan/batch")
+def scan_batch(scans: List[ScanLine] = Body(..., embed=True), db: Session = Depends(get_db)):
+    if not scans:
+        raise HTTPException(status_code=400, detail="No scans to apply")
+    deltas = {}
+    for scan in scans:
+        deltas[scan.code] = deltas.get(scan.code, 0) + scan.quantity_change
+
+    rows = db.query(Item.id, Item.sku, Item.name, Item.category_id, Item.quantity).filter(
+        Item.sku.in_(list(deltas)), Item.deleted_at.is_(None)
+    ).all()
+    by_code = {row.sku: row for row in rows}
+    unknown = [code for code in deltas if code not in by_code]
+    if unknown:
+        raise HTTPException(status_code=404, detail={"message": "Unknown codes", "codes": unknown})
+
+    # Totals may not drop below what is placed at locations (or below zero)
+    changes = {by_code[code].id: delta for code, delta in deltas.items() if delta != 0}
+    placed = dict(
+        db.query(ItemStock.item_id, func.sum(ItemStock.quantity))
+        .filter(ItemStock.item_id.in_(list(changes)))
+        .group_by(ItemStock.item_id)
+    ) if changes else {}
+    short = [
+        code for code, row in by_code.items()
+        if row.id in changes and row.quantity + changes[row.id] < placed.get(row.id, 0)
+    ]
+    if short:
+        raise HTTPException(status_code=409, detail={"message": "Not enough stock", "codes": short})
+
+    quantities = {row.id: row.quantity for row in rows}
+    logs = []
+    try:
+        if changes:
+            new_quantity = Item.quantity + case(changes, value=Item.id, else_=0)
+            allocated = select(func.coalesce(func.sum(ItemStock.quantity), 0)).where(
+                ItemStock.item_id == Item.id
+            ).scalar_subquery()
+            # The same guard as above, re-checked by the UPDATE itself in case stock moved since the read
+            updated = db.execute(
+                update(Item)
+                .where(Item.id.in_(list(changes)), Item.deleted_at.is_(None), new_quantity >= allocated)
+                .values(quantity=new_quantity, version=Item.version + 1)
+                .returning(Item.id, Item.quantity)
+            ).all()
+            if len(updated) != len(changes):
+                db.rollback()
+                raise HTTPException(status_code=409, detail="Stock changed while the scans were applied; retry")
+            quantities.update(dict(updated))
+            logs = [
+                Log(
+                    action="scan",
+                    item_id=row.id,
+                    category_id=row.category_id,
+                    quantity_change=changes[row.id],
+                    description=f"Scanned {row.sku} ({row.name}): {changes[row.id]:+d}"
+                )
+                for row in rows if row.id in changes
+            ]
+            db.add_all(logs)
+            db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Error applying scans")
+
+    for log in logs:
+        events.event_bus.publish(events.log_event(log))
+    check_low_stock(db, list(changes))
+    return [
+        {
+            "code": code,
+            "item_id": by_code[code].id,
+            "name": by_code[code].name,
+            "quantity_change": delta,
+            "quantity": quantities[by_code[code].id]
+        }
+        for code, delta in deltas.items()
+    ]
+
+# Delta sync for offline clients: rows changed since the cursor plus ids deleted since then.
+# Without a cursor everything is returned and the client replaces its replica
+@app.get("/sync")
+def sync(since: datetime = None, db: Session = Depends(get_db)):
+    since = utc_naive(since)
+    try:
+        now = datetime.utcnow()
+        cursor = now - SYNC_OVERLAP
+        # Compaction may have purged tombstones this client never saw
+        if since is not None and since < now - TOMBSTONE_RETENTION:
+            since = None
+        categories = db.query(Category).filter(Category.deleted_at.is_(None))
+        items = db.query(Item).filter(Item.deleted_at.is_(None))
+        deleted = {"categories": [], "items": []}
+        if since is not None:
+            categories = categories.filter(Category.updated_at >= since)
+            items = items.filter(Item.updated_at >= since)
+            deleted["categories"] = [row_id for (row_id,) in db.query(Category.id).filter(Category.deleted_at >= since)]
+            deleted["items"] = [row_id for (row_id,) in db.query(Item.id).filter(Item.deleted_at >= since)]
+        return {
+            "cursor": cursor.isoformat(),
+            "full": since is None,
+            "categories": jsonable_encoder(categories.all()),
+            "items": jsonable_encoder(items.all()),
+            "deleted": deleted
+        }
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Failed to sync")
+
+# Change feed: every Log row as a server-sent event. Reconnecting clients resume after
+# the id they last saw (Last-Event-ID header or ?last_event_id=), replayed from the Log table
+@app.get("/events")
+async def stream_events(request: Request, last_event_id: int = None):
+    header = request.headers.get("Last-Event-ID", "")
+    if last_event_id is None and header.isdigit():
+        last_event_id = int(header)
+
+    async def event_stream():
+        yield "retry: 3000\n\n"
+        async for event in events.stream(last_event_id):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Same feed over a WebSocket, one JSON event per message
+@app.websocket("/ws/events")
+async def websocket_events(websocket: WebSocket, last_event_id: int = None):
+    await websocket.accept()
+    try:
+        async for event in events.stream(last_event_id):
+            await websocket.send_json(event if event is not None else {"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
+
+# Analyze an RFQ email: report items we already stock, then stream supplier results
+# for the remaining items as server-sent events
+@app.post("/rfq/analyze")
+def analyze_rfq(email: str = Body(..., embed=True), db: Session = Depends(get_db)):
+    # Imported lazily so the LLM stack is only loaded when RFQ analysis is used
+    from misc import extract_rfq_items, build_search_email, stream_supplier_info
+
+    try:
+        rfq_items = extract_rfq_items(email)
+        matched, unmatched = match_rfq_items(db, rfq_items)
+    except Exception:
+        logger.exception("RFQ item extraction failed")
+        raise HTTPException(status_code=500, detail="Error analyzing RFQ")
+
+    # Fall back to searching the whole email if no line items could be extracted
+    search_email = build_search_email(unmatched) if unmatched else (None if rfq_items else email)
+
+    def event_stream():
+        for match in matched:
+            yield f"event: stock\ndata: {json.dumps(match)}\n\n"
+        if search_email is not None:
+            try:
+                for item in stream_supplier_info(search_email):
+                    yield f"event: item\ndata: {item.model_dump_json()}\n\n"
+            except Exception:
+                logger.exception("RFQ supplier search failed")
+                yield f"event: error\ndata: {json.dumps({'detail': 'Error analyzing RFQ'})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -0,0 +1,139 @@
+# backend/matching.py
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from database import Item
+
+# Words that carry no meaning when comparing RFQ lines with item names
+STOP_WORDS = {"a", "an", "and", "the", "of", "for", "with", "to", "in", "on", "pcs", "pc", "units", "unit"}
+
+
+def normalize(text: Optional[str]) -> str:
+    # Lowercase, drop punctuation and stop words, collapse whitespace
+    if not text:
+        return ""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return " ".join(word for word in words if word not in STOP_WORDS)
+
+
+def trigrams(text: str) -> Set[str]:
+    # Padded character trigrams per word, so short words still produce grams
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class InventoryIndex:
+    """Trigram index over item names and descriptions.
+
+    Built once from the ``items`` table and kept in sync by the item write
+    endpoints, so RFQ lines can be matched without scanning the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self.built = False
+
+    def build(self, db: Session):
+        rows = db.query(Item.id, Item.name, Item.description).filter(Item.deleted_at.is_(None)).yield_per(10000)
+        with self._lock:
+            self._grams.clear()
+            self._postings.clear()
+            for item_id, name, description in rows:
+                self._add(item_id, name, description)
+            self.built = True
+
+    def _add(self, item_id: int, name: Optional[str], description: Optional[str]):
+        grams = trigrams(normalize(f"{name or ''} {description or ''}"))
+        self._grams[item_id] = grams
+        for gram in grams:
+            self._postings[gram].add(item_id)
+
+    def _remove(self, item_id: int):
+        for gram in self._grams.pop(item_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(item_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def upsert(self, item_id: int, name: Optional[str], description: Optional[str]):
+        if not self.built:
+            return
+        with self._lock:
+            self._remove(item_id)
+            self._add(item_id, name, description)
+
+    def remove(self, item_id: int):
+        if not self.built:
+            return
+        with self._lock:
+            self._remove(item_id)
+
+    def search(self, query: str, limit: int = 5, threshold: float = 0.4) -> List[Tuple[int, float]]:
+        # Score candidates sharing at least one gram by the share of query grams they contain
+        query_grams = trigrams(normalize(query))
+        if not query_grams:
+            return []
+        counts: Dict[int, int] = defaultdict(int)
+        with self._lock:
+            for gram in query_grams:
+                for item_id in self._postings.get(gram, ()):
+                    counts[item_id] += 1
+        scored = [
+            (item_id, hits / len(query_grams))
+            for item_id, hits in counts.items()
+            if hits / len(query_grams) >= threshold
+        ]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+
+inventory_index = InventoryIndex()
+
+
+def get_inventory_index(db: Session) -> InventoryIndex:
+    if not inventory_index.built:
+        inventory_index.build(db)
+    return inventory_index
+
+
+def match_rfq_items(db: Session, rfq_items: Iterable[str], threshold: float = 0.6) -> Tuple[List[dict], List[str]]:
+    """Split RFQ line items into ones we already stock and ones that need a supplier search.
+
+    Returns ``(matched, unmatched)``; each matched entry carries the best
+    inventory item and its current quantity.
+    """
+    index = get_inventory_index(db)
+    best = {}
+    for rfq_item in rfq_items:
+        hits = index.search(rfq_item, limit=1, threshold=threshold)
+        best[rfq_item] = hits[0] if hits else None
+
+    # Quantities change often, so read them in one query instead of caching them in the index
+    item_ids = {hit[0] for hit in best.values() if hit}
+    stock = {}
+    if item_ids:
+        rows = db.query(Item.id, Item.name, Item.quantity).filter(Item.id.in_(item_ids), Item.deleted_at.is_(None)).all()
+        stock = {row.id: row for row in rows}
+
+    matched, unmatched = [], []
+    for rfq_item, hit in best.items():
+        row = stock.get(hit[0]) if hit else None
+        if row is None or not row.quantity:
+            unmatched.append(rfq_item)
+            continue
+        matched.append({
+            "rfq_item": rfq_item,
+            "item_id": row.id,
+            "name": row.name,
+            "quantity": row.quantity,
+            "score": round(hit[1], 3),
+        })
+    return matched, unmatched
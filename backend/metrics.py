@@ -0,0 +1,176 @@
+# backend/metrics.py
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+
+# Metrics are opt-in; when disabled no middleware or SQLAlchemy listeners are installed
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """Per-request accumulator filled in by the SQLAlchemy cursor events."""
+
+    __slots__ = ("query_count", "query_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], float] = {}
+        self.in_flight = 0
+        self.engine = None
+
+    def start_request(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.db_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.latency[key].observe(elapsed)
+            self.db_queries[key].observe(stats.query_count)
+            self.db_time[key] = self.db_time.get(key, 0.0) + stats.query_time
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP http_requests_total Requests handled, by route and status.")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {value}')
+
+            lines.append("# HELP http_request_duration_seconds Request latency by route.")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.latency.items()):
+                _render_histogram(lines, "http_request_duration_seconds", f'method="{method}",route="{route}"', histogram)
+
+            lines.append("# HELP http_requests_in_flight Requests currently being handled.")
+            lines.append("# TYPE http_requests_in_flight gauge")
+            lines.append(f"http_requests_in_flight {self.in_flight}")
+
+            lines.append("# HELP db_queries_per_request SQL statements executed per request.")
+            lines.append("# TYPE db_queries_per_request histogram")
+            for (method, route), histogram in sorted(self.db_queries.items()):
+                _render_histogram(lines, "db_queries_per_request", f'method="{method}",route="{route}"', histogram)
+
+            lines.append("# HELP db_query_seconds_total Time spent in SQL statements by route.")
+            lines.append("# TYPE db_query_seconds_total counter")
+            for (method, route), value in sorted(self.db_time.items()):
+                lines.append(f'db_query_seconds_total{{method="{method}",route="{route}"}} {value:.6f}')
+
+        pool = getattr(self.engine, "pool", None)
+        if pool is not None and hasattr(pool, "checkedout"):
+            lines.append("# HELP db_pool_checked_out Connections currently checked out of the pool.")
+            lines.append("# TYPE db_pool_checked_out gauge")
+            lines.append(f"db_pool_checked_out {pool.checkedout()}")
+            lines.append("# HELP db_pool_size Configured pool size.")
+            lines.append("# TYPE db_pool_size gauge")
+            lines.append(f"db_pool_size {pool.size()}")
+            lines.append("# HELP db_pool_overflow Connections opened beyond the pool size.")
+            lines.append("# TYPE db_pool_overflow gauge")
+            lines.append(f"db_pool_overflow {max(0, pool.overflow())}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(lines, name: str, labels: str, histogram: Histogram):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+registry = Registry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if starts:
+        stats.query_time += time.perf_counter() - starts.pop()
+    stats.query_count += 1
+
+
+def instrument_engine(engine):
+    registry.engine = engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(request) -> str:
+    # Use the route template, never the raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def install(app, engine):
+    """Adds the metrics middleware, SQL listeners and the /metrics endpoint to the app."""
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    instrument_engine(engine)
+
+    @app.middleware("http")
+    async def collect_metrics(request: Request, call_next):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        registry.start_request()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            registry.finish_request(request.method, route_label(request), status, time.perf_counter() - start, stats)
+            current_request.reset(token)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
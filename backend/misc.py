@@ -6,7 +6,9 @@ from langchain_community.tools import DuckDuckGoSearchRun
 from langchain.schema import AgentAction, AgentFinish
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import LLMChain
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Iterator, Optional
+from pydantic import BaseModel, Field, ValidationError
+import json
 import re
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -17,6 +19,21 @@ os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
 # Initialize the search tool
 search = DuckDuckGoSearchRun()
 
+# Structured result types produced by the agent
+class SupplierLink(BaseModel):
+    url: str
+    score: float = Field(0.0, ge=0.0, le=1.0)  # relevance/credibility score from the agent
+
+class ItemSuppliers(BaseModel):
+    item: str
+    suppliers: List[SupplierLink] = []
+
+class RFQResult(BaseModel):
+    items: List[ItemSuppliers] = []
+
+# Each finished item is emitted on its own line so it can be streamed before the run completes
+ITEM_RESULT_RE = re.compile(r"^\s*Item Result:\s*(\{.*\})\s*$", re.MULTILINE)
+
 # Define the custom prompt template
 class CustomPromptTemplate(StringPromptTemplate):
     template: str
@@ -67,9 +84,12 @@ Thought: I will evaluate the results based on the item specifications and suppli
 Action: Record links to relevant suppliers
 Observation: {Supplier Links}
 
+As soon as you have finished evaluating an item, write its result on a single line as JSON:
+Item Result: {{"item": "<item name>", "suppliers": [{{"url": "<supplier url>", "score": <0.0 to 1.0>}}]}}
+
 Repeat this process for each item in the RFQ.
 
-Final Answer: A list of items from the RFQ, each with its list of links to relevant suppliers.
+Final Answer: A JSON object of the form {{"items": [<one Item Result object per item>]}}
 
 {agent_scratchpad}
 """
@@ -132,34 +152,112 @@ agent = create_tool_calling_agent(
 # Create the agent executor
 agent_executor = AgentExecutor.from_agent_and_tools(agent=agent, tools=tools, verbose=True)
 
-# Function to process the RFQ email
-def get_supplier_info(email_content: str) -> Dict[str, List[str]]:
-    # result = agent_executor.run(email=email_content)
+# The same model bound to the result schema; turns a final answer the model did not write as
+# valid JSON into an RFQResult instead of relying on the prompt's format instructions alone
+structured_gemini = gemini.with_structured_output(RFQResult)
+
+def structure_final_answer(output: str) -> Optional[RFQResult]:
+    if not output or not output.strip():
+        return None
+    result = structured_gemini.invoke(
+        "Convert the supplier findings below into the requested structure. "
+        "Use only items and URLs that appear in the text.\n\n" + output
+    )
+    return result if isinstance(result, RFQResult) else None
+
+# Prompt used to pull the individual line items out of an RFQ before any searching
+extraction_template = """
+Extract every item requested in the following RFQ email.
+Respond only with a JSON array of strings, one per item, each containing the item name followed by its key specifications.
+
+Email:
+{email}
+"""
+
+def extract_rfq_items(email_content: str) -> List[str]:
+    response = gemini.invoke(extraction_template.format(email=email_content))
+    text = response.content if hasattr(response, "content") else str(response)
+    if not isinstance(text, str):
+        text = ''.join(map(str, text))
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return []
+    return [str(item).strip() for item in items if str(item).strip()]
+
+def build_search_email(rfq_items: List[str]) -> str:
+    # Restate only the items that still need suppliers so the agent skips stocked ones
+    lines = "\n".join(f"{i}. {item}" for i, item in enumerate(rfq_items, start=1))
+    return f"We are looking for quotations for the following items:\n\n{lines}"
+
+def _agent_inputs(email_content: str) -> Dict[str, str]:
     tool_strings = "\n".join([f"{tool.name}: {tool.description}" for tool in tools])
     tool_names = ", ".join([tool.name for tool in tools])
-    result = agent_executor.invoke({
+    return {
         "email": email_content,
         "tools": tool_strings,
         "tool_names": tool_names,
         "agent_scratchpad": ""
-    })
-    return result
-    # Parse the result and return a dictionary of items and their potential supplier websites
+    }
 
-def parse_supplier_info(result):
-    # Get the 'output' field from the input dictionary
+# Function to process the RFQ email
+def get_supplier_info(email_content: str) -> Dict[str, str]:
+    return agent_executor.invoke(_agent_inputs(email_content))
+
+def parse_item_results(text: str) -> List[ItemSuppliers]:
+    # Collect every well-formed "Item Result:" line, skipping ones the model mangled
+    results = []
+    for match in ITEM_RESULT_RE.finditer(text):
+        try:
+            results.append(ItemSuppliers.model_validate_json(match.group(1)))
+        except ValidationError:
+            continue
+    return results
+
+def stream_supplier_info(email_content: str) -> Iterator[ItemSuppliers]:
+    # Yield each item as soon as the agent reports it instead of waiting for the final answer
+    seen = set()
+    for chunk in agent_executor.stream(_agent_inputs(email_content)):
+        if "output" in chunk:
+            final = parse_supplier_info(chunk) or structure_final_answer(str(chunk["output"]))
+            found = final.items if final else []
+        else:
+            found = []
+            for action in chunk.get("actions", []):
+                found.extend(parse_item_results(action.log))
+        for item in found:
+            if item.item in seen:
+                continue
+            seen.add(item.item)
+            yield item
+
+def parse_supplier_info(result) -> Optional[RFQResult]:
+    # Get the 'output' field from the agent result
     output = result.get('output', '')
-    print(f"Output content: {output}")  # Debug print
-
-    # Find the Final Answer section
-    match = re.search(r'Final Answer:\s*(.*?)(?:\n\n|$)', output, re.DOTALL)
-    if not match:
-        print("No 'Final Answer:' section found")  # Debug print
+    if not isinstance(output, str):
+        output = str(output)
+    if "Final Answer:" in output:
+        output = output.split("Final Answer:")[-1]
+    output = output.strip()
+
+    # Preferred path: the final answer is the structured JSON object
+    start, end = output.find("{"), output.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(output[start:end + 1])
+            if isinstance(data, dict) and "items" in data:
+                return RFQResult.model_validate(data)
+        except (ValueError, ValidationError):
+            pass
+
+    # Fallback: rebuild the result from the per-item lines
+    items = parse_item_results(output)
+    if not items:
         return None
-
-    final_answer = match.group(1).strip()
-    print(f"Final Answer content: \n {final_answer}")  # Debug print
-    return(f"""Final Answer content: \n {final_answer}""")
+    return RFQResult(items=items)
 
 # Example usage
 if __name__ == "__main__":
@@ -265,4 +363,5 @@ if __name__ == "__main__":
     doc = loader.load()
     result = get_supplier_info(doc)
     print(result)
-    print(parse_supplier_info(result))
\ No newline at end of file
+    parsed = parse_supplier_info(result)
+    print(parsed.model_dump_json(indent=2) if parsed else "No structured result found")
\ No newline at end of file
@@ -0,0 +1,239 @@
+# backend/profiling.py
+import os
+import json
+import time
+import logging
+import inspect
+import functools
+import threading
+from logging.handlers import RotatingFileHandler
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from fastapi.routing import APIRoute
+
+# Profiling is opt-in: statements are captured per request only when enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "./slow_queries.log")
+# Cap on distinct statements kept for /debug/slow-queries
+MAX_TRACKED_STATEMENTS = 1000
+
+slow_query_logger = logging.getLogger("inventory.slow_queries")
+
+
+class RequestProfile:
+    __slots__ = ("path", "queries", "pending", "db_time", "handler_time", "handler_db_time")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.queries: List[dict] = []
+        # SELECTs run through a Session whose rows are still being counted; None outside one
+        self.pending: Optional[List[dict]] = None
+        self.db_time = 0.0
+        self.handler_time = 0.0
+        self.handler_db_time = 0.0
+
+    def breakdown(self, total: float) -> dict:
+        # Handler excludes SQL run inside it; whatever remains is validation and serialization
+        handler = max(0.0, self.handler_time - self.handler_db_time)
+        serialization = max(0.0, total - self.handler_time - (self.db_time - self.handler_db_time))
+        return {
+            "total_ms": round(total * 1000, 3),
+            "db_ms": round(self.db_time * 1000, 3),
+            "handler_ms": round(handler * 1000, 3),
+            "serialization_ms": round(serialization * 1000, 3),
+            "queries": self.queries,
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class StatementStats:
+    __slots__ = ("calls", "total", "max", "slow_calls")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow_calls = 0
+
+
+_stats_lock = threading.Lock()
+_statement_stats: Dict[str, StatementStats] = {}
+
+
+def _record(statement: str, elapsed: float):
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    with _stats_lock:
+        stats = _statement_stats.get(statement)
+        if stats is None and len(_statement_stats) < MAX_TRACKED_STATEMENTS:
+            stats = _statement_stats[statement] = StatementStats()
+        if stats is not None:
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.slow_calls += slow
+
+
+def _log_if_slow(entry: dict, profile: RequestProfile):
+    if entry["ms"] >= SLOW_QUERY_MS:
+        slow_query_logger.warning(json.dumps({
+            "path": profile.path,
+            "ms": entry["ms"],
+            "rows": entry["rows"],
+            "statement": entry["statement"],
+        }))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    # DBAPIs report -1 for SELECTs; their rows are counted once fetched, in _count_rows
+    rowcount = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    entry = {"statement": statement, "ms": round(elapsed * 1000, 3), "rows": rowcount}
+    profile.db_time += elapsed
+    profile.queries.append(entry)
+    _record(statement, elapsed)
+    if cursor.description is not None and profile.pending is not None:
+        profile.pending.append(entry)
+    else:
+        _log_if_slow(entry, profile)
+
+
+def _count_rows(orm_execute_state):
+    """Fetches a Session SELECT's rows up front so the profile can report how many there were.
+
+    Streamed results (yield_per) are left alone and keep rows unknown.
+    """
+    profile = current_profile.get()
+    options = orm_execute_state.execution_options
+    if profile is None or not orm_execute_state.is_select or options.get("yield_per") or options.get("stream_results"):
+        return None
+    outer, profile.pending = profile.pending, []
+    try:
+        # Buffering here is what .all()/.first() would do anyway; nested loads count themselves
+        frozen = orm_execute_state.invoke_statement().freeze()
+        mine = profile.pending
+    finally:
+        profile.pending = outer
+    for entry in mine:
+        if entry["rows"] is None:
+            entry["rows"] = len(frozen.data)
+        _log_if_slow(entry, profile)
+    return frozen()
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that times the endpoint function separately from serialization."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+
+
+def _timed(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            profile = current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            start, db_before = time.perf_counter(), profile.db_time
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.handler_time += time.perf_counter() - start
+                profile.handler_db_time += profile.db_time - db_before
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        start, db_before = time.perf_counter(), profile.db_time
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.handler_time += time.perf_counter() - start
+            profile.handler_db_time += profile.db_time - db_before
+    return wrapper
+
+
+def top_statements(limit: int) -> List[dict]:
+    with _stats_lock:
+        ranked = sorted(_statement_stats.items(), key=lambda pair: pair[1].total, reverse=True)[:limit]
+        return [
+            {
+                "statement": statement,
+                "calls": stats.calls,
+                "total_ms": round(stats.total * 1000, 3),
+                "mean_ms": round(stats.total * 1000 / stats.calls, 3),
+                "max_ms": round(stats.max * 1000, 3),
+                "slow_calls": stats.slow_calls,
+            }
+            for statement, stats in ranked
+        ]
+
+
+def install(app, engine):
+    """Wires statement capture, the X-Debug-Profile response and /debug/slow-queries into the app.
+
+    Must run before any route is declared so the routes use ProfiledRoute.
+    """
+    from fastapi import Request, Query
+    from fastapi.responses import Response
+
+    if not slow_query_logger.handlers:
+        handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=10 * 1024 * 1024, backupCount=5)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.propagate = False
+
+    app.router.route_class = ProfiledRoute
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Session, "do_orm_execute", _count_rows)
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        profile = RequestProfile(request.url.path)
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            current_profile.reset(token)
+        # Streams (the /events SSE feed) never finish, so they are never buffered for the breakdown
+        if "X-Debug-Profile" not in request.headers or response.headers.get("content-type", "").startswith(
+            "text/event-stream"
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        breakdown = profile.breakdown(time.perf_counter() - start)
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers["Server-Timing"] = (
+            f"db;dur={breakdown['db_ms']}, handler;dur={breakdown['handler_ms']}, "
+            f"serialization;dur={breakdown['serialization_ms']}"
+        )
+        # JSON responses get the breakdown inline next to the original payload
+        if response.media_type == "application/json" or headers.get("content-type", "").startswith("application/json"):
+            body = json.dumps({"data": json.loads(body or b"null"), "profile": breakdown}).encode()
+        return Response(content=body, status_code=response.status_code, headers=headers)
+
+    @app.get("/debug/slow-queries")
+    def read_slow_queries(limit: int = Query(20, ge=1, le=MAX_TRACKED_STATEMENTS)):
+        return top_statements(limit)
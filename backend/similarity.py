@@ -0,0 +1,188 @@
+# backend/similarity.py
+import os
+import json
+import zlib
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from database import Item
+from matching import normalize
+
+# Number of hashed feature buckets per item vector
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "256"))
+# Optional path prefix for persisting the index between restarts (memory-mapped on load)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH")
+
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.5
+NAME_WEIGHT = 2.0
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    # crc32 is stable across processes, unlike hash(); the top bit picks the sign
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % VECTOR_DIM, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _add_features(vector: np.ndarray, text: Optional[str], weight: float):
+    for word in normalize(text).split():
+        index, sign = _bucket(f"w:{word}")
+        vector[index] += sign * WORD_WEIGHT * weight
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            index, sign = _bucket(f"c:{padded[i:i + 3]}")
+            vector[index] += sign * TRIGRAM_WEIGHT * weight
+
+
+def embed(name: Optional[str], description: Optional[str] = None) -> np.ndarray:
+    """Hashing-trick embedding of an item's name and description, L2 normalized."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    _add_features(vector, name, NAME_WEIGHT)
+    _add_features(vector, description, 1.0)
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class VectorIndex:
+    """Dense matrix of item embeddings answering cosine top-k queries.
+
+    Rows are appended on create, overwritten on update and recycled on delete,
+    so the matrix never has to be rebuilt after the first load.
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)  # item id per row, -1 for free rows
+        self._rows = {}  # item id -> row
+        self._free: List[int] = []
+        self._size = 0
+        self.built = False
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._ids):
+            return
+        capacity = max(capacity, 2 * len(self._ids), 1024)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.full(capacity, -1, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def _set(self, item_id: int, vector: np.ndarray):
+        row = self._rows.get(item_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                self._reserve(self._size + 1)
+                row = self._size
+                self._size += 1
+            self._rows[item_id] = row
+            self._ids[row] = item_id
+        self._matrix[row] = vector
+
+    def _delete(self, item_id: int):
+        row = self._rows.pop(item_id, None)
+        if row is not None:
+            self._matrix[row] = 0
+            self._ids[row] = -1
+            self._free.append(row)
+
+    def build(self, db: Session):
+        if VECTOR_INDEX_PATH and os.path.exists(f"{VECTOR_INDEX_PATH}.json"):
+            with open(f"{VECTOR_INDEX_PATH}.json") as f:
+                meta = json.load(f)
+            # A snapshot saved with another VECTOR_DIM cannot be reused; rebuild it from the table
+            if meta.get("dim") == self.dim:
+                self._load_and_catch_up(db, meta)
+                return
+        live = db.query(Item).filter(Item.deleted_at.is_(None))
+        count = live.count()
+        with self._lock:
+            self._reserve(count)
+            for item_id, name, description in live.with_entities(Item.id, Item.name, Item.description).yield_per(10000):
+                self._set(item_id, embed(name, description))
+            self.built = True
+
+    def _load_and_catch_up(self, db: Session, meta: dict):
+        # Copy-on-write mapping: pages are read lazily, updates never touch the file
+        matrix = np.load(f"{VECTOR_INDEX_PATH}.vectors.npy", mmap_mode="c")
+        ids = np.load(f"{VECTOR_INDEX_PATH}.ids.npy")
+        watermark = datetime.fromisoformat(meta["updated_at"]) if meta.get("updated_at") else None
+        with self._lock:
+            self._matrix, self._ids = matrix, ids
+            self._size = len(ids)
+            self._rows = {int(item_id): row for row, item_id in enumerate(ids) if item_id >= 0}
+            self._free = [row for row, item_id in enumerate(ids) if item_id < 0]
+
+            # Re-embed rows changed since the snapshot and drop rows deleted since then
+            changed = db.query(Item.id, Item.name, Item.description).filter(Item.deleted_at.is_(None))
+            if watermark is not None:
+                changed = changed.filter(Item.updated_at > watermark)
+            for item_id, name, description in changed.yield_per(10000):
+                self._set(item_id, embed(name, description))
+            live = {item_id for (item_id,) in db.query(Item.id).filter(Item.deleted_at.is_(None))}
+            for item_id in [item_id for item_id in self._rows if item_id not in live]:
+                self._delete(item_id)
+            self.built = True
+
+    def save(self, db: Session):
+        if not VECTOR_INDEX_PATH:
+            return
+        watermark = db.query(Item.updated_at).order_by(Item.updated_at.desc()).limit(1).scalar()
+        with self._lock:
+            np.save(f"{VECTOR_INDEX_PATH}.vectors.npy", np.ascontiguousarray(self._matrix[:self._size]))
+            np.save(f"{VECTOR_INDEX_PATH}.ids.npy", self._ids[:self._size])
+        with open(f"{VECTOR_INDEX_PATH}.json", "w") as f:
+            json.dump({"dim": self.dim, "updated_at": watermark.isoformat() if watermark else None}, f)
+
+    def upsert(self, item_id: int, name: Optional[str], description: Optional[str]):
+        if not self.built:
+            return
+        vector = embed(name, description)
+        with self._lock:
+            self._set(item_id, vector)
+
+    def remove(self, item_id: int):
+        if not self.built:
+            return
+        with self._lock:
+            self._delete(item_id)
+
+    def vector_for(self, item_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(item_id)
+            return None if row is None else np.array(self._matrix[row])
+
+    def search(self, vector: np.ndarray, k: int = 10, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        with self._lock:
+            if not self._size:
+                return []
+            # Free rows are all zeros, so they score 0 and are dropped below without a mask
+            scores = self._matrix[:self._size] @ vector
+            if exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+            k = min(k, self._size)
+            # argpartition keeps this O(n) instead of sorting every score
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (int(self._ids[row]), float(scores[row]))
+                for row in top
+                if np.isfinite(scores[row]) and scores[row] > 0
+            ]
+
+
+vector_index = VectorIndex()
+
+
+def get_vector_index(db: Session) -> VectorIndex:
+    if not vector_index.built:
+        vector_index.build(db)
+    return vector_index
@@ -0,0 +1,129 @@
+# backend/stock.py
+"""Per-location stock.
+
+Item.quantity stays the item's total, so item reads never sum across locations;
+item_stock holds how much of it sits at each location and the rest is unassigned.
+Every write applies the same delta to item_stock, Item.quantity and
+Location.total_quantity as in-place increments in the caller's transaction, so
+concurrent writers never overwrite each other's counts. The unassigned stock is
+derived from two tables, so whatever checks against it (placing unassigned units,
+lowering the total) first takes the item row's lock with lock_item. Nothing here
+commits.
+"""
+from sqlalchemy import update, select, case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from database import Item, Location, ItemStock
+
+
+def allocated(db, item_id):
+    """Units of the item placed at any location."""
+    return db.query(func.coalesce(func.sum(ItemStock.quantity), 0)).filter(ItemStock.item_id == item_id).scalar()
+
+
+def lock_item(db, item_id):
+    """Holds the item row's write lock until the transaction ends.
+
+    A no-op UPDATE rather than SELECT ... FOR UPDATE, so it also serializes writers on SQLite.
+    """
+    db.execute(
+        update(Item).where(Item.id == item_id).values(quantity=Item.quantity, updated_at=Item.updated_at)
+    )
+
+
+def _ensure_row(db, item_id, location_id):
+    if db.get(ItemStock, (item_id, location_id)) is None:
+        db.add(ItemStock(item_id=item_id, location_id=location_id, quantity=0))
+        db.flush()
+
+
+def _execute(db, statement):
+    # item_stock's check constraint is the final guard against overdrawing a location
+    try:
+        return db.execute(statement)
+    except IntegrityError:
+        raise ValueError("Not enough stock at the location")
+
+
+def _add_to_locations(db, changes):
+    # changes: {location_id: delta}, applied in one UPDATE
+    changes = {location_id: delta for location_id, delta in changes.items() if location_id is not None}
+    if changes:
+        db.execute(
+            update(Location)
+            .where(Location.id.in_(list(changes)))
+            .values(total_quantity=Location.total_quantity + case(changes, value=Location.id, else_=0))
+        )
+
+
+def adjust(db, item_id, location_id, quantity_change):
+    """Receives (positive) or removes (negative) stock at a location; the item's total moves with it."""
+    _ensure_row(db, item_id, location_id)
+    _execute(db, (
+        update(ItemStock)
+        .where(ItemStock.item_id == item_id, ItemStock.location_id == location_id)
+        .values(quantity=ItemStock.quantity + quantity_change)
+    ))
+    db.execute(
+        update(Item).where(Item.id == item_id).values(quantity=Item.quantity + quantity_change, version=Item.version + 1)
+    )
+    _add_to_locations(db, {location_id: quantity_change})
+
+
+def transfer(db, item_id, from_location_id, to_location_id, quantity):
+    """Moves quantity between two locations, or to/from unassigned stock when a side is None.
+
+    The item's total is unchanged. Raises ValueError if the source does not hold enough.
+    """
+    if to_location_id is not None:
+        _ensure_row(db, item_id, to_location_id)
+
+    if from_location_id is not None and to_location_id is not None:
+        # Both rows change in a single UPDATE, so there is no moment where the units are in neither place
+        result = _execute(db, (
+            update(ItemStock)
+            .where(ItemStock.item_id == item_id, ItemStock.location_id.in_([from_location_id, to_location_id]))
+            .values(quantity=ItemStock.quantity + case(
+                (ItemStock.location_id == to_location_id, quantity), else_=-quantity
+            ))
+        ))
+        moved = result.rowcount == 2
+    elif from_location_id is not None:
+        result = _execute(db, (
+            update(ItemStock)
+            .where(ItemStock.item_id == item_id, ItemStock.location_id == from_location_id)
+            .values(quantity=ItemStock.quantity - quantity)
+        ))
+        moved = result.rowcount == 1
+    else:
+        # Unassigned = total minus everything placed; checked in the same statement that places the units,
+        # with the item locked so a concurrent placement or a lowered total cannot slip past the check
+        lock_item(db, item_id)
+        placed = aliased(ItemStock)
+        unassigned = (
+            select(Item.quantity).where(Item.id == item_id).scalar_subquery()
+            - select(func.coalesce(func.sum(placed.quantity), 0)).where(placed.item_id == item_id).scalar_subquery()
+        )
+        result = db.execute(
+            update(ItemStock)
+            .where(ItemStock.item_id == item_id, ItemStock.location_id == to_location_id, unassigned >= quantity)
+            .values(quantity=ItemStock.quantity + quantity)
+        )
+        moved = result.rowcount == 1
+    if not moved:
+        raise ValueError("Not enough stock at the source")
+    _add_to_locations(db, {from_location_id: -quantity, to_location_id: quantity})
+
+
+def release(db, item_ids):
+    """Drops the per-location stock of deleted items and takes it off the location totals."""
+    if not item_ids:
+        return
+    totals = (
+        db.query(ItemStock.location_id, func.sum(ItemStock.quantity))
+        .filter(ItemStock.item_id.in_(item_ids))
+        .group_by(ItemStock.location_id)
+        .all()
+    )
+    _add_to_locations(db, {location_id: -quantity for location_id, quantity in totals})
+    db.query(ItemStock).filter(ItemStock.item_id.in_(item_ids)).delete(synchronize_session=False)
@@ -0,0 +1,159 @@
+# backend/throttle.py
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Token bucket settings: sustained requests per second and burst size per client (0, the default, disables)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+# "memory" for a single worker, "sqlite" to share buckets between workers on one host
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./rate_limit.db")
+# Peers (reverse proxies, the Streamlit server) whose X-Client-Id header is believed; everyone else is keyed by address
+RATE_LIMIT_TRUSTED_PROXIES = {
+    host.strip() for host in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if host.strip()
+}
+
+
+def client_key(peer, client_id=None):
+    """Bucket key for a request: the peer address, or the X-Client-Id a trusted peer set."""
+    if client_id and peer in RATE_LIMIT_TRUSTED_PROXIES:
+        return f"id:{client_id}"
+    return peer or "unknown"
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result (or exception). Nothing is cached
+    once the call finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "_Call"] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MemoryTokenBucket:
+    """Per-client token buckets held in process memory."""
+
+    blocking = False
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def consume(self, client: str) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._evict_idle(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+    def _evict_idle(self, now: float):
+        # A bucket that would have refilled completely carries no state worth keeping
+        refill = self.burst / self.rate
+        for client, (_, updated) in list(self._buckets.items()):
+            if now - updated >= refill:
+                del self._buckets[client]
+
+
+class SQLiteTokenBucket:
+    """Per-client token buckets in a SQLite file shared by all workers on a host."""
+
+    blocking = True
+
+    def __init__(self, rate: float, burst: float, path: str):
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, client: str) -> Tuple[bool, float]:
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE client = ?", (client,)
+            ).fetchone()
+            tokens, updated = row if row else (self.burst, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                (client, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+def create_rate_limiter():
+    if RATE_LIMIT_PER_SECOND <= 0:
+        return None
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteTokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_SQLITE_PATH)
+    return MemoryTokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
@@ -0,0 +1,98 @@
+# benchmarks/bench_api.py
+"""In-process API benchmark.
+
+Drives the FastAPI app through httpx's ASGI transport, so numbers reflect
+routing, handlers, SQL and serialization without any network stack.
+
+    python -m benchmarks.seed --profile small --db bench.db
+    python -m benchmarks.bench_api --db bench.db --requests 500 --concurrency 8
+"""
+import time
+import asyncio
+import argparse
+import sqlite3
+from benchmarks.common import use_backend, summarize, save_results, print_table, is_error
+from benchmarks import routes
+
+
+def seeded_volumes(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            "categories": conn.execute("SELECT COALESCE(MAX(id), 0) FROM categories").fetchone()[0],
+            "items": conn.execute("SELECT COALESCE(MAX(id), 0) FROM items").fetchone()[0],
+            "locations": conn.execute("SELECT COALESCE(MAX(id), 0) FROM locations").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+async def run_route(client, name, build, volumes, requests, concurrency, seed):
+    rng = routes.make_rng(seed, name)
+    plan = [build(rng, volumes) for _ in range(requests)]
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for request in plan:
+        queue.put_nowait(request)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                method, path, params, *body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body[0] if body else None)
+            # Only successful requests are timed; a fast 404 or 409 would flatter the percentiles
+            if is_error(response.status_code):
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run(args):
+    import httpx
+
+    use_backend(args.db)
+    from main import app
+
+    volumes = seeded_volumes(args.db)
+    selected = routes.select(args.routes)
+    # Server errors are recorded per route instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, build in selected.items():
+            # Warm caches and lazily built indexes outside the measured window
+            await run_route(client, name, build, volumes, args.warmup, 1, args.seed + 1)
+            results[name] = await run_route(
+                client, name, build, volumes, args.requests, args.concurrency, args.seed
+            )
+            print_table({name: results[name]})
+    return volumes, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process ASGI benchmark of the inventory API")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--routes", default="all", help="'all', 'reads', 'writes' or comma separated route names")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    volumes, results = asyncio.run(run(args))
+    config = {**vars(args), "volumes": volumes}
+    path = save_results("asgi", config, results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
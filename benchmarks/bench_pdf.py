@@ -0,0 +1,139 @@
+# benchmarks/bench_pdf.py
+"""Micro-benchmarks for the PDF report in frontend/pdf_test.py.
+
+Times generate_pdf across row counts and description sizes, and
+html_to_flowables across description sizes and nested-list depth. Each case
+records wall time (best and median of the repeats), peak traced memory and
+output size.
+
+    python -m benchmarks.bench_pdf                      # 10, 1k and 10k rows
+    python -m benchmarks.bench_pdf --rows 10,1000,10000,100000 --repeat 1
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from statistics import median
+from benchmarks.common import ROOT, save_results
+
+FRONTEND_DIR = os.path.join(ROOT, "frontend")
+LOGO_PATH = os.path.join(FRONTEND_DIR, "logo.png")
+WORDS = "widget bracket steel valve sensor adjustable heavy duty compact industrial grade".split()
+
+
+def sample_items(rows, description_words, seed=42):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "id": range(1, rows + 1),
+        "name": [f"Widget {i}" for i in range(rows)],
+        "updated_at": ["2024-09-26 10:24:43"] * rows,
+        "created_at": ["2024-09-25 08:00:00"] * rows,
+        "quantity": [rng.randrange(0, 500) for _ in range(rows)],
+        "description": [" ".join(rng.choice(WORDS) for _ in range(description_words)) for _ in range(rows)],
+        "category_id": [1] * rows,
+    })
+
+
+def nested_list(depth, width=3):
+    if depth == 0:
+        return ""
+    items = "".join(f"<li>Level {depth} item {i}{nested_list(depth - 1, width)}</li>" for i in range(width))
+    return f"<ul>{items}</ul>"
+
+
+def sample_description(paragraphs, list_depth):
+    body = "".join(
+        f"<p>Paragraph {i}: {' '.join(WORDS * 3)}</p><h3>Section {i}</h3>" for i in range(paragraphs)
+    )
+    return body + nested_list(list_depth)
+
+
+def measure(fn, repeat):
+    """Runs fn repeat times; memory is traced on a separate run so it does not skew timings."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "best_s": round(min(timings), 4),
+        "median_s": round(median(timings), 4),
+        "peak_mib": round(peak / 2 ** 20, 2),
+    }
+
+
+def bench_generate_pdf(rows_list, description_words_list, repeat):
+    from pdf_test import generate_pdf
+
+    description = sample_description(paragraphs=3, list_depth=1)
+    results = {}
+    for rows in rows_list:
+        for words in description_words_list:
+            items_df = sample_items(rows, words)
+            name = f"generate_pdf rows={rows} description_words={words}"
+            try:
+                pdf, stats = measure(lambda: generate_pdf("Benchmark", description, items_df, LOGO_PATH), repeat)
+            except Exception as e:
+                # Record layout failures as results instead of aborting the whole run
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"{name:<55} {results[name]}")
+                continue
+            stats["output_bytes"] = len(pdf)
+            results[name] = stats
+            print(f"{name:<55} {stats}")
+    return results
+
+
+def bench_html_to_flowables(paragraph_list, depth_list, repeat):
+    from pdf_test import build_styles, html_to_flowables
+
+    styles = build_styles()
+    results = {}
+    for paragraphs in paragraph_list:
+        for depth in depth_list:
+            html = sample_description(paragraphs, depth)
+            flowables, stats = measure(lambda: html_to_flowables(html, styles), repeat)
+            stats["input_bytes"] = len(html)
+            stats["flowables"] = len(flowables)
+            name = f"html_to_flowables paragraphs={paragraphs} list_depth={depth}"
+            results[name] = stats
+            print(f"{name:<55} {stats}")
+    return results
+
+
+def _ints(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF report generation")
+    parser.add_argument("--rows", type=_ints, default=_ints("10,1000,10000"))
+    parser.add_argument("--description-words", type=_ints, default=_ints("5,60"))
+    parser.add_argument("--paragraphs", type=_ints, default=_ints("1,20,200"))
+    parser.add_argument("--list-depth", type=_ints, default=_ints("0,3,6"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    if FRONTEND_DIR not in sys.path:
+        sys.path.insert(0, FRONTEND_DIR)
+
+    results = {}
+    results.update(bench_generate_pdf(args.rows, args.description_words, args.repeat))
+    results.update(bench_html_to_flowables(args.paragraphs, args.list_depth, args.repeat))
+    path = save_results("pdf", vars(args), results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
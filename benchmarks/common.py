@@ -0,0 +1,97 @@
+# benchmarks/common.py
+import os
+import sys
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Seeded timestamps fall in [SEED_START, SEED_START + SEED_DAYS)
+SEED_START = datetime(2023, 1, 1)
+SEED_DAYS = 730
+
+# Seed volumes; "large" is the 1M items / 10M logs scenario
+PROFILES = {
+    "small": {"categories": 50, "items": 10_000, "logs": 100_000},
+    "medium": {"categories": 200, "items": 100_000, "logs": 1_000_000},
+    "large": {"categories": 1_000, "items": 1_000_000, "logs": 10_000_000},
+}
+
+
+def use_backend(db_path):
+    """Points the backend at the benchmark database and makes its modules importable."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+    # Benchmarks measure the API itself, not the per-client throttle
+    os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def is_error(status):
+    # Fixtures are built to succeed, so any non-2xx (a 404 id, a 409 conflict, a 422) is a failed request
+    return not 200 <= status < 300
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Latencies in seconds -> p50/p95/p99 in milliseconds plus throughput."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 3) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+        "max_ms": round(values[-1] * 1000, 3) if values else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(kind, config, results, output=None):
+    """Writes a results file tagged with the commit so runs can be compared later."""
+    revision = git_revision()
+    payload = {
+        "kind": kind,
+        "revision": revision,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{kind}-{revision}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+def print_table(results):
+    print(f"{'route':<45} {'reqs':>7} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+    for name, stats in results.items():
+        print(
+            f"{name:<45} {stats['requests']:>7} {stats['throughput_rps'] or 0:>9.1f} "
+            f"{stats['p50_ms'] or 0:>9.2f} {stats['p95_ms'] or 0:>9.2f} {stats['p99_ms'] or 0:>9.2f} "
+            f"{stats['errors']:>5}"
+        )
@@ -0,0 +1,60 @@
+# benchmarks/compare.py
+"""Compares two results files and flags latency regressions.
+
+    python -m benchmarks.compare benchmarks/results/asgi-abc123-*.json benchmarks/results/asgi-def456-*.json
+
+API results (asgi, http) are compared on p95_ms by default, PDF results on median_s.
+"""
+import sys
+import json
+import argparse
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "throughput_rps", "best_s", "median_s", "peak_mib"]
+DEFAULT_METRIC = {"pdf": "median_s"}
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", choices=METRICS, help="default: median_s for pdf results, p95_ms otherwise")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    metric = args.metric or DEFAULT_METRIC.get(candidate.get("kind"), "p95_ms")
+    # PDF case names are longer than route names
+    width = max([45] + [len(name) for name in candidate["results"]])
+    print(f"{metric}: {baseline['revision']} -> {candidate['revision']}")
+    print(f"{'case':<{width}} {'baseline':>10} {'candidate':>10} {'change':>8}")
+
+    regressions = 0
+    higher_is_better = metric in HIGHER_IS_BETTER
+    for name, stats in candidate["results"].items():
+        before = baseline["results"].get(name, {}).get(metric)
+        after = stats.get(metric)
+        if "error" in stats and "error" not in baseline["results"].get(name, {"error": None}):
+            # A case that used to run and now fails (e.g. a PDF layout error) is a regression too
+            regressions += 1
+            print(f"{name:<{width}} {before if before is not None else '-':>10} {'error':>10} {'':>8}  REGRESSION")
+            continue
+        if not before or after is None:
+            print(f"{name:<{width}} {'-':>10} {after if after is not None else '-':>10} {'':>8}")
+            continue
+        change = (after - before) / before * 100
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<{width}} {before:>10.2f} {after:>10.2f} {change:>+7.1f}%{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/load.py
+"""Multi-process HTTP load generator.
+
+Runs against a live server (e.g. ``uvicorn main:app --workers 4`` in backend/)
+with one keep-alive connection per process, so it measures the full stack
+including the ASGI server and the connection pool under real parallelism.
+
+    python -m benchmarks.load --url http://127.0.0.1:8000 --db bench.db --processes 8 --duration 30
+"""
+import json
+import time
+import argparse
+import http.client
+from urllib.parse import urlencode, urlsplit
+from multiprocessing import Pool
+from benchmarks.common import summarize, save_results, print_table, is_error
+from benchmarks.bench_api import seeded_volumes
+from benchmarks import routes
+
+
+def _worker(job):
+    url, route_names, volumes, duration, seed, worker_id = job
+    selected = routes.select(",".join(route_names))
+    rng = routes.make_rng(seed, f"worker-{worker_id}")
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    headers = {"X-Client-Id": f"bench-{worker_id}"}
+    names = list(selected)
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        name = rng.choice(names)
+        method, path, params, *body = selected[name](rng, volumes)
+        target = f"{path}?{urlencode(params)}" if params else path
+        start = time.perf_counter()
+        try:
+            if body:
+                conn.request(method, target, body=json.dumps(body[0]), headers={**headers, "Content-Type": "application/json"})
+            else:
+                conn.request(method, target, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if is_error(response.status):
+                errors[name] += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors[name] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        latencies[name].append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process HTTP load test of the inventory API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--db", default="bench.db", help="seeded database, used to pick valid ids")
+    parser.add_argument("--routes", default="reads", help="'all', 'reads', 'writes' or comma separated route names")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per process")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    volumes = seeded_volumes(args.db)
+    route_names = list(routes.select(args.routes))
+    jobs = [(args.url, route_names, volumes, args.duration, args.seed, i) for i in range(args.processes)]
+
+    started = time.perf_counter()
+    with Pool(args.processes) as pool:
+        outcomes = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in route_names:
+        latencies = [value for outcome in outcomes for value in outcome[0][name]]
+        errors = sum(outcome[1][name] for outcome in outcomes)
+        results[name] = summarize(latencies, elapsed, errors)
+    all_latencies = [value for outcome in outcomes for values in outcome[0].values() for value in values]
+    results["total"] = summarize(all_latencies, elapsed, sum(sum(o[1].values()) for o in outcomes))
+
+    print_table(results)
+    config = {**vars(args), "volumes": volumes}
+    path = save_results("http", config, results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/routes.py
+"""Request mix covering the routes in backend/main.py.
+
+Each entry builds ``(method, path, params)``, or ``(method, path, params, json_body)``,
+from a random generator and the seeded volumes, so runs are reproducible for a given seed. Writes mutate the
+database; reseed before comparing write latencies between commits.
+"""
+import random
+from datetime import datetime, timedelta
+
+SEARCH_TERMS = ("bolt", "steel", "lamp", "valve", "gear", "glove", "pump motor")
+
+
+def _item_id(rng, volumes):
+    # The top tenth of the ids is left to DELETE, so no other route draws an item it deleted
+    return rng.randrange(1, max(1, volumes["items"] - volumes["items"] // 10) + 1)
+
+
+def _deletable_item_id(rng, volumes):
+    return rng.randrange(max(1, volumes["items"] - volumes["items"] // 10) + 1, volumes["items"] + 1)
+
+
+def _category_id(rng, volumes):
+    return rng.randrange(1, volumes["categories"] + 1)
+
+
+def _location_id(rng, volumes):
+    return rng.randrange(1, max(1, volumes.get("locations", 0)) + 1)
+
+
+def _sku(rng, volumes):
+    # Same codes benchmarks.seed gives every item
+    return f"SKU-{_item_id(rng, volumes):08d}"
+
+
+READ_ROUTES = {
+    "GET /categories/": lambda rng, v: ("GET", "/categories/", {}),
+    "GET /categories/{id}": lambda rng, v: ("GET", f"/categories/{_category_id(rng, v)}", {}),
+    "GET /items/": lambda rng, v: ("GET", "/items/", {"skip": rng.randrange(0, max(1, v["items"] - 10))}),
+    "GET /items/{id}": lambda rng, v: ("GET", f"/items/{_item_id(rng, v)}", {}),
+    "GET /items/{id}/similar": lambda rng, v: ("GET", f"/items/{_item_id(rng, v)}/similar", {}),
+    "GET /search/": lambda rng, v: ("GET", "/search/", {"query": rng.choice(SEARCH_TERMS)}),
+    "GET /search/semantic": lambda rng, v: ("GET", "/search/semantic", {"q": rng.choice(SEARCH_TERMS)}),
+    "GET /categories/{id}/items/": lambda rng, v: ("GET", f"/categories/{_category_id(rng, v)}/items/", {}),
+    "GET /categories/{id}/logs/": lambda rng, v: ("GET", f"/categories/{_category_id(rng, v)}/logs/", {}),
+    "GET /logs/deleted_categories": lambda rng, v: ("GET", "/logs/deleted_categories", {}),
+    # A client that last synced a day ago; benchmarks.seed backdates about 1% of item edits into that day
+    "GET /sync (delta)": lambda rng, v: (
+        "GET", "/sync", {"since": (datetime.utcnow() - timedelta(days=1)).isoformat()}
+    ),
+    "GET /logs": lambda rng, v: ("GET", "/logs", {"category_id": _category_id(rng, v), "newest_first": True}),
+    "GET /logs/aggregate": lambda rng, v: (
+        "GET", "/logs/aggregate", {"group_by": rng.choice(["day", "action", "category"])}
+    ),
+    "GET /items/by-code/{code}": lambda rng, v: ("GET", f"/items/by-code/{_sku(rng, v)}", {}),
+    "GET /items/{id}/forecast": lambda rng, v: ("GET", f"/items/{_item_id(rng, v)}/forecast", {}),
+    "GET /items/{id}/stock": lambda rng, v: ("GET", f"/items/{_item_id(rng, v)}/stock", {}),
+    "GET /locations/": lambda rng, v: ("GET", "/locations/", {}),
+    "GET /locations/{id}/stock": lambda rng, v: ("GET", f"/locations/{_location_id(rng, v)}/stock", {}),
+    "GET /alerts/low-stock": lambda rng, v: ("GET", "/alerts/low-stock", {"limit": 100}),
+    "GET /analytics/stock-by-category": lambda rng, v: ("GET", "/analytics/stock-by-category", {}),
+    "GET /analytics/stock-over-time": lambda rng, v: (
+        "GET", "/analytics/stock-over-time", {"days": 90, "category_id": _category_id(rng, v)}
+    ),
+    "GET /analytics/velocity": lambda rng, v: ("GET", "/analytics/velocity", {"days": 30, "limit": 50}),
+    # Full table exports; expect these to dominate a mixed run
+    "GET /export/items.parquet": lambda rng, v: ("GET", "/export/items.parquet", {}),
+    "GET /export/logs.arrow": lambda rng, v: ("GET", "/export/logs.arrow", {}),
+}
+
+WRITE_ROUTES = {
+    "POST /categories/": lambda rng, v: ("POST", "/categories/", {"name": f"bench-{rng.getrandbits(48):x}"}),
+    "PUT /categories/{id}": lambda rng, v: (
+        "PUT", f"/categories/{_category_id(rng, v)}",
+        {"name": f"bench-{rng.getrandbits(48):x}", "description": "<p>benchmark</p>"},
+    ),
+    "POST /items/": lambda rng, v: (
+        "POST", "/items/",
+        {"name": f"bench item {rng.getrandbits(32)}", "description": "benchmark item",
+         "category_id": _category_id(rng, v), "quantity": rng.randrange(1, 100)},
+    ),
+    "PUT /items/{id}": lambda rng, v: (
+        "PUT", f"/items/{_item_id(rng, v)}", {"quantity": rng.randrange(100, 500)},
+    ),
+    "DELETE /items/{id}": lambda rng, v: ("DELETE", f"/items/{_deletable_item_id(rng, v)}", {}),
+    "PUT /items/{id}/reorder-level": lambda rng, v: (
+        "PUT", f"/items/{_item_id(rng, v)}/reorder-level", {"reorder_level": rng.randrange(0, 50)},
+    ),
+    "PUT /categories/{id}/reorder-level": lambda rng, v: (
+        "PUT", f"/categories/{_category_id(rng, v)}/reorder-level", {"reorder_level": rng.randrange(0, 50)},
+    ),
+    "POST /locations/": lambda rng, v: ("POST", "/locations/", {"name": f"bench-{rng.getrandbits(48):x}"}),
+    "POST /items/{id}/stock/{location_id}": lambda rng, v: (
+        "POST", f"/items/{_item_id(rng, v)}/stock/{_location_id(rng, v)}", {"quantity_change": rng.randrange(1, 20)},
+    ),
+    "POST /transfers/": lambda rng, v: (
+        "POST", "/transfers/", {"item_id": _item_id(rng, v), "quantity": rng.randrange(1, 5), "to_location_id": _location_id(rng, v)},
+    ),
+    "POST /scan/batch": lambda rng, v: (
+        "POST", "/scan/batch", {},
+        {"scans": [{"code": _sku(rng, v), "quantity_change": rng.choice([-1, 1])} for _ in range(20)]},
+    ),
+}
+
+# Routes left out on purpose: /rfq/analyze calls an external LLM, /metrics and /debug/* are diagnostics,
+# /events and /ws/events are long-lived streams, /analytics/status is a cheap status probe, a full /sync
+# dumps the whole database, and DELETE /categories/{id} would soft-delete the seeded items a category at a time
+ALL_ROUTES = {**READ_ROUTES, **WRITE_ROUTES}
+
+
+def select(names):
+    """Resolves a comma separated list of route names (or 'reads'/'writes'/'all')."""
+    if not names or names == "all":
+        return dict(ALL_ROUTES)
+    if names == "reads":
+        return dict(READ_ROUTES)
+    if names == "writes":
+        return dict(WRITE_ROUTES)
+    wanted = [name.strip() for name in names.split(",")]
+    unknown = [name for name in wanted if name not in ALL_ROUTES]
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(unknown)}")
+    return {name: ALL_ROUTES[name] for name in wanted}
+
+
+def make_rng(seed, name):
+    return random.Random(f"{seed}:{name}")
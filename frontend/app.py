@@ -1,8 +1,16 @@
 import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_quill import st_quill
 import markdownify
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlencode
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -13,6 +21,9 @@ LOGO_PATH = os.getenv("LOGO_PATH")
 
 st.set_page_config(page_title="InvenSuite", page_icon=":material/inventory:")
 
+# Start timing as early as possible so the debug sidebar shows the full render
+render_started = time.perf_counter()
+
 st.title("Inventory Management System")
 
 # Initialize session state for 'last_category' if not already set
@@ -27,12 +38,140 @@ if password != os.getenv("PASSWORD"):
 
 
 #########################################################################################################
+# Shared HTTP session and cached reads
+CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))  # seconds
+REQUEST_TIMEOUT = 10  # seconds
+PAGE_SIZE = 100  # rows per page in paginated tables
+LOG_FIELDS = "id,action,item_id,quantity_change,description,timestamp"  # columns shown for logs
+ITEM_FIELDS = "id,name,sku,quantity,category_id,created_at,updated_at"  # columns shown for items
+
+@st.cache_resource
+def get_adapter():
+    # One keep-alive connection pool for every rerun and user session
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        # Writes are safe to retry because every POST, PUT and DELETE sends an Idempotency-Key
+        allowed_methods=["GET", "PUT", "DELETE", "POST"]
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+
+def get_session():
+    # One requests session per browser session, sharing the pool above. Its X-Client-Id gives every
+    # dashboard user their own rate-limit bucket when this server is in RATE_LIMIT_TRUSTED_PROXIES
+    session = st.session_state.get("http_session")
+    if session is None:
+        session = requests.Session()
+        session.headers["X-Client-Id"] = f"streamlit-{uuid.uuid4()}"
+        session.mount("http://", get_adapter())
+        session.mount("https://", get_adapter())
+        st.session_state["http_session"] = session
+    return session
+
+def form_version(kind, record_id, current_version):
+    # The version an edit form was first loaded at. Reruns and cache refreshes can't swap a newer one
+    # in under the user's edits; it is only dropped after a successful save or an explicit reload
+    return st.session_state.setdefault(f"{kind}_version_{record_id}", current_version)
+
+def if_match_headers(version):
+    # If-Match makes the update fail with 409 if someone else saved since the form was loaded.
+    # The Idempotency-Key makes a retried PUT replay the first attempt's answer instead of
+    # failing its own If-Match once that attempt has already committed
+    headers = idempotency_headers()
+    if version is not None:
+        headers["If-Match"] = f'"{version}"'
+    return headers
+
+def forget_form_version(kind, record_id):
+    st.session_state.pop(f"{kind}_version_{record_id}", None)
+    st.session_state.pop(f"{kind}_conflict_{record_id}", None)
+
+def conflict_notice(kind, record_id):
+    if st.session_state.get(f"{kind}_conflict_{record_id}"):
+        st.warning(f"This {kind} was changed by someone else. Load the latest version, review it and try again.")
+        if st.button("Load the latest version", key=f"{kind}_reload_{record_id}"):
+            forget_form_version(kind, record_id)
+            invalidate_cache()
+            st.rerun()
+
+def idempotency_headers():
+    # One key per user action; the session's automatic retries resend it, so the backend runs the write once
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def api_get(path, params=None):
+    # Cache 2xx/4xx answers; server errors raise so they are never cached
+    response = get_session().get(f"{API_URL}{path}", params=params, timeout=REQUEST_TIMEOUT)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response.status_code, response.json()
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def api_get_page(path, params=None):
+    # Like api_get, plus the cursor for the next page from the X-Next-Cursor header
+    response = get_session().get(f"{API_URL}{path}", params=params, timeout=REQUEST_TIMEOUT)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    next_cursor = response.headers.get("X-Next-Cursor")
+    return response.status_code, response.json(), int(next_cursor) if next_cursor else None
+
+def invalidate_cache():
+    # Call after every create/update/delete so the next rerun sees fresh data
+    api_get.clear()
+    api_get_page.clear()
+
+def fetch_all_pages(path, fields=None, page_size=1000):
+    # Walk every page of a cursor-paginated endpoint; used for full exports only
+    rows, cursor = [], None
+    while True:
+        status, page, cursor = api_get_page(path, {"cursor": cursor, "limit": page_size, "fields": fields})
+        if status != 200:
+            return status, page if not rows else rows
+        rows.extend(page)
+        if cursor is None:
+            return status, rows
+
+def fetch_page(key, path, fields=None, newest_first=False):
+    # The page the user is on; the stack of cursors lives in session state so paging survives reruns.
+    # Only the log routes take newest_first, so it is sent only when asked for
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    params = {"cursor": cursors[-1], "limit": PAGE_SIZE, "fields": fields}
+    if newest_first:
+        params["newest_first"] = True
+    return api_get_page(path, params)
+
+def page_controls(key, next_cursor):
+    cursors = st.session_state[f"{key}_cursors"]
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Next", key=f"{key}_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+def paged_table(key, path, fields=None, empty_message="No rows found.", newest_first=False):
+    # Renders one page at a time in a virtualized st.dataframe with Previous/Next controls
+    try:
+        status, rows, next_cursor = fetch_page(key, path, fields, newest_first)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Failed to fetch rows: {e}")
+        return
+    if status != 200 or not rows:
+        st.info(empty_message)
+        return
+
+    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    page_controls(key, next_cursor)
+
 # Function to fetch categories
 def fetch_categories():
     try:
-        response = requests.get(f"{API_URL}/categories/")
-        if response.status_code == 200:
-            return response.json()
+        status, categories = api_get("/categories/")
+        if status == 200:
+            return categories
         else:
             st.error("Failed to fetch categories")
             return []
@@ -43,16 +182,21 @@ def fetch_categories():
 # Function to fetch logs by category
 def fetch_logs_by_category(category_id):
     try:
-        response = requests.get(f"{API_URL}/categories/{category_id}/logs/")
-        response.raise_for_status()
-        return response.json()
+        status, logs = fetch_all_pages(f"/categories/{category_id}/logs/", LOG_FIELDS)
+        if status != 200:
+            st.error(f"Failed to fetch logs: {logs.get('detail', status)}")
+            return []
+        return logs
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch logs: {e}")
         return []
 
 def delete_category(category_id):
     try:
-        response = requests.delete(f"{API_URL}/categories/{category_id}")
+        response = get_session().delete(
+            f"{API_URL}/categories/{category_id}", timeout=REQUEST_TIMEOUT, headers=idempotency_headers()
+        )
+        invalidate_cache()
         if response.status_code == 200:
             st.success("Category deleted successfully")
         else:
@@ -60,21 +204,12 @@ def delete_category(category_id):
     except Exception as e:
         st.error(f"Failed to delete category: {e}")
 
-def fetch_items():
-    try:
-        response = requests.get(f"{API_URL}/items/")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error("Failed to fetch items")
-            return []
-    except Exception as e:
-        st.error(f"Failed to fetch items: {e}")
-        return []
-
 def delete_item(item_id):
     try:
-        response = requests.delete(f"{API_URL}/items/{item_id}")
+        response = get_session().delete(
+            f"{API_URL}/items/{item_id}", timeout=REQUEST_TIMEOUT, headers=idempotency_headers()
+        )
+        invalidate_cache()
         if response.status_code == 200:
             st.success("Item deleted successfully")
         else:
@@ -84,19 +219,39 @@ def delete_item(item_id):
 
 def fetch_logs_of_deleted_categories():
     try:
-        response = requests.get(f"{API_URL}/logs/deleted_categories")
-        if response.status_code == 200:
-            return response.json()
+        status, logs = fetch_all_pages("/logs/deleted_categories", LOG_FIELDS)
+        if status == 200:
+            return logs
         else:
             st.error("Failed to fetch logs of deleted categories")
             return []
     except Exception as e:
         st.error(f"Failed to fetch logs of deleted categories: {e}")
         return []
+def prefetch(*calls):
+    # Warm the request caches for independent fetches in parallel instead of one after another.
+    # Each call is (fetch, path, *args) with the same arguments the caller passes afterwards
+    ctx = get_script_run_ctx()
+
+    def load(call):
+        fetch, path, *args = call
+        add_script_run_ctx(threading.current_thread(), ctx)
+        started = time.perf_counter()
+        try:
+            fetch(path, *args)
+        except Exception:
+            pass  # the caller's own fetch reports the error when it needs the data
+        label = f"{path}?{urlencode(args[0])}" if args and isinstance(args[0], dict) else path
+        return label, (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        fetch_timings.update(pool.map(load, calls))
 #########################################################################################################
 # Function to generate PDF
 from pdf_test import generate_pdf
 
+# Per-request timings of the parallel batches fetched on this run, for the debug sidebar
+fetch_timings = {}
 
 # Display Categories
 st.header("Categories")
@@ -135,11 +290,15 @@ with c_tab1:
 
             if st.button(f"Show Items in {selected_category}"):
                 if selected_category_id:
-                    items = requests.get(f"{API_URL}/categories/{selected_category_id}/items/").json()
-                    description = requests.get(f"{API_URL}/categories/{selected_category_id}").json().get('description', 'No description available')
+                    # The listing doubles as the PDF/CSV export, so every page is fetched
+                    items_path = f"/categories/{selected_category_id}/items/"
+                    prefetch((fetch_all_pages, items_path), (api_get, f"/categories/{selected_category_id}"))
+                    _, items = fetch_all_pages(items_path)
+                    _, category = api_get(f"/categories/{selected_category_id}")
+                    description = category.get('description', 'No description available')
                     if items:
                         st.subheader(f"Items in {selected_category}")
-                        st.table(items)
+                        st.dataframe(items, width="stretch", hide_index=True)
 
                         # Convert items to a DataFrame for download
                         if isinstance(items, dict):
@@ -195,7 +354,13 @@ with c_tab2:
             if not new_category_name:
                 st.warning("Category name cannot be empty")
             try:
-                response = requests.post(f"{API_URL}/categories/", params={"name": new_category_name})
+                response = get_session().post(
+                    f"{API_URL}/categories/",
+                    params={"name": new_category_name},
+                    headers=idempotency_headers(),
+                    timeout=REQUEST_TIMEOUT
+                )
+                invalidate_cache()
                 response.raise_for_status()
                 st.success("Category created successfully")
                 st.rerun()
@@ -210,6 +375,7 @@ with c_tab3:
     # Create dictionaries for easy lookup
     category_dict = {category['id']: category['name'] for category in categories}
     description_dict = {category['id']: category.get('description', '') for category in categories}
+    version_dict = {category['id']: category.get('version') for category in categories}
     
     with st.expander("Click to Edit a Category Name and Description"):
         try:
@@ -223,6 +389,7 @@ with c_tab3:
                 current_description = description_dict.get(category_id_to_edit, "")
                 # new_category_description = st.text_area("New Category Description", value=current_description)
                 new_category_description = st_quill(value=current_description, html=True, preserve_whitespace=True)
+                category_version = form_version("category", category_id_to_edit, version_dict.get(category_id_to_edit))
     
                 if st.button("Update Category"):
                     if not new_category_name:
@@ -232,8 +399,10 @@ with c_tab3:
                     else:
                         try:
                             # Update both name and description
-                            response = requests.put(
+                            response = get_session().put(
                                 f"{API_URL}/categories/{category_id_to_edit}/",
+                                timeout=REQUEST_TIMEOUT,
+                                headers=if_match_headers(category_version),
                                 params={
                                     "name": new_category_name,
                                     # "description": markdownify.markdownify(
@@ -244,11 +413,17 @@ with c_tab3:
                                 }
                             )
                             print(new_category_description)
-                            response.raise_for_status()
-                            st.success(f"Category '{new_category_name}' updated successfully")
-                            st.rerun()
+                            invalidate_cache()
+                            if response.status_code == 409:
+                                st.session_state[f"category_conflict_{category_id_to_edit}"] = True
+                            else:
+                                response.raise_for_status()
+                                forget_form_version("category", category_id_to_edit)
+                                st.success(f"Category '{new_category_name}' updated successfully")
+                                st.rerun()
                         except requests.exceptions.RequestException as e:
                             st.error(f"Failed to update category: {e}")
+                conflict_notice("category", category_id_to_edit)
             else:
                 st.info("No categories available to edit.")
         except requests.exceptions.RequestException as e:
@@ -337,8 +512,10 @@ with tab1:
                     st.error("Item name cannot be empty")
                 else:
                     try:
-                        response = requests.post(
+                        response = get_session().post(
                             f"{API_URL}/items/",
+                            timeout=REQUEST_TIMEOUT,
+                            headers=idempotency_headers(),
                             params={
                                 "name": item_name,
                                 "description": item_description,
@@ -346,6 +523,7 @@ with tab1:
                                 "quantity": item_quantity
                             }
                         )
+                        invalidate_cache()
                         response.raise_for_status()
                         st.success("Item created successfully")
                         
@@ -363,7 +541,7 @@ with tab2:
         item_id_to_edit = st.number_input("Enter Item ID to Edit", min_value=1, step=1)
         if item_id_to_edit:
             try:
-                item = requests.get(f"{API_URL}/items/{item_id_to_edit}").json()
+                _, item = api_get(f"/items/{item_id_to_edit}")
                 if all(key in item for key in ['name', 'description', 'quantity', 'category_id']):
                     item_name_edit = st.text_input("Edit Item Name", value=item['name'])
                     item_description_edit = st.text_area("Edit Item Description", value=item['description'])
@@ -374,6 +552,7 @@ with tab2:
                         index=next((i for i, cat in enumerate(categories) if cat['id'] == item['category_id']), 0)
                     )
                     category_id_edit = next((id for id, name in category_dict.items() if name == item_category_name_edit), None)
+                    item_version = form_version("item", item_id_to_edit, item.get("version"))
 
                     if st.button("Update Item :material/create:"):
                         if category_id_edit is None:
@@ -382,8 +561,10 @@ with tab2:
                             st.error("Item name cannot be empty")
                         else:
                             try:
-                                response = requests.put(
+                                response = get_session().put(
                                     f"{API_URL}/items/{item_id_to_edit}",
+                                    timeout=REQUEST_TIMEOUT,
+                                    headers=if_match_headers(item_version),
                                     params={
                                         "name": item_name_edit,
                                         "description": item_description_edit,
@@ -391,11 +572,17 @@ with tab2:
                                         "category_id": category_id_edit
                                     }
                                 )
-                                response.raise_for_status()
-                                st.success("Item updated successfully")
-                                st.rerun()
+                                invalidate_cache()
+                                if response.status_code == 409:
+                                    st.session_state[f"item_conflict_{item_id_to_edit}"] = True
+                                else:
+                                    response.raise_for_status()
+                                    forget_form_version("item", item_id_to_edit)
+                                    st.success("Item updated successfully")
+                                    st.rerun()
                             except requests.exceptions.RequestException as e:
                                 st.error(f"Failed to update item: {e}")
+                    conflict_notice("item", item_id_to_edit)
                         # else:
                         #     st.error("Selected category ID not found.")
                 else:
@@ -409,12 +596,10 @@ with tab3:
     search_query = st.text_input("Enter search query")
     if st.button("Search"):
         try:
-            response = requests.get(f"{API_URL}/search/", params={"query": search_query})
-            response.raise_for_status()
-            search_results = response.json()
-            if search_results:
+            status, search_results = api_get("/search/", params={"query": search_query})
+            if status == 200 and search_results:
                 st.write("Search Results:")
-                st.table(search_results)
+                st.dataframe(search_results, width="stretch", hide_index=True)
 
                 # Convert search results to a DataFrame for download
                 search_results_df = pd.DataFrame(search_results)
@@ -439,31 +624,36 @@ with tab3:
 # Display Items
 with tab4:
     st.subheader("List Items")
-    try:
-        items = requests.get(f"{API_URL}/items/").json()
-        with st.expander("Click to Show All Items"):
-            # st.write("This is the content inside the expander.")
-            st.write(items)
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching items: {e}")
+    # A toggle instead of an expander, so the list is only rendered once it is opened
+    if st.toggle("Show All Items"):
+        paged_table("items", "/items/", ITEM_FIELDS, empty_message="No items found.")
 
 # Section to delete items
 with tab5:
     st.subheader("Delete Item")
-    items = fetch_items()
+    # Items are only fetched once the user asks for them, one page at a time
+    if st.toggle("Choose an item to delete"):
+        try:
+            status, items, next_cursor = fetch_page("delete_items", "/items/", "id,name")
+        except requests.exceptions.RequestException as e:
+            st.error(f"Failed to fetch items: {e}")
+            status, items = None, []
 
-    if items:
-        item_options = {item['name']: item['id'] for item in items}
-        selected_item = st.selectbox("Select an item to delete", list(item_options.keys()))
-        
-        if selected_item:
-            item_id = item_options[selected_item]
-            
-            if st.button("Delete Item"):
-                delete_item(item_id)
-                st.rerun()
-    else:
-        st.info("No items found.")
+        if status == 200 and items:
+            item_options = {f"{item['name']} (ID: {item['id']})": item['id'] for item in items}
+            selected_item = st.selectbox("Select an item to delete", list(item_options.keys()))
+
+            if selected_item:
+                item_id = item_options[selected_item]
+
+                if st.button("Delete Item"):
+                    delete_item(item_id)
+                    st.rerun()
+        else:
+            st.info("No items found.")
+        if status == 200:
+            # Also shown on an emptied page, so the user can page back
+            page_controls("delete_items", next_cursor)
 
 st.divider()
 #########################################################################################################
@@ -471,7 +661,7 @@ st.divider()
 
 # View Logs Section
 st.header("View Logs")
-l_tab1, l_tab2 = st.tabs(["View Logs by Category", "View Logs of Deleted Categories"])
+l_tab1, l_tab2, l_tab3 = st.tabs(["View Logs by Category", "View Logs of Deleted Categories", "Activity"])
 
 with l_tab1:
 
@@ -498,30 +688,27 @@ with l_tab1:
             # Debugging: Display the selected category and its ID
             # st.write(f"Selected Category: {selected_category} (ID: {category_id})")
 
-            # Button to view logs for the selected category
-            if st.button("View Logs"):
-                # Fetch logs for the selected category
-                logs = fetch_logs_by_category(category_id)
-
-                # Debugging: Display the fetched logs
-                # st.write("Fetched Logs:", logs)
-
-                if logs:
-                    # Convert logs to DataFrame for display and download
-                    logs_df = pd.DataFrame(logs)
-                    st.write("Logs for selected category:")
-                    st.table(logs_df)
-
-                    # Button to download the logs as a CSV file
-                    csv_data = logs_df.to_csv(index=False)
-                    st.download_button(
-                        label="Download logs as CSV :material/download:",
-                        data=csv_data,
-                        file_name=f"{selected_category}_logs.csv",
-                        mime='text/csv'
-                    )
-                else:
-                    st.info("No logs found for this category.")
+            # Toggle rather than a button so paging through logs survives reruns
+            if st.toggle("View Logs"):
+                st.write("Logs for selected category (newest first):")
+                paged_table(
+                    f"logs_{category_id}",
+                    f"/categories/{category_id}/logs/",
+                    LOG_FIELDS,
+                    "No logs found for this category.",
+                    newest_first=True
+                )
+
+                # The full history is only fetched when an export is requested
+                if st.button("Prepare CSV of all logs"):
+                    logs = fetch_logs_by_category(category_id)
+                    if logs:
+                        st.download_button(
+                            label="Download logs as CSV :material/download:",
+                            data=pd.DataFrame(logs).to_csv(index=False),
+                            file_name=f"{selected_category}_logs.csv",
+                            mime='text/csv'
+                        )
     else:
         st.info("No categories found.")
 
@@ -529,23 +716,76 @@ with l_tab1:
 with l_tab2:
     # Section to view logs of deleted categories
 
-    if st.button("View Deleted Category Logs"):
-        logs = fetch_logs_of_deleted_categories()
-        
-        if logs:
-            logs_df = pd.DataFrame(logs)
-            st.write("Logs of deleted categories:")
-            st.table(logs_df)
-            
-            # Allow logs to be downloaded as CSV
-            csv_data = logs_df.to_csv(index=False)
-            st.download_button(
-                label="Download logs as CSV :material/download:",
-                data=csv_data,
-                file_name="deleted_category_logs.csv",
-                mime='text/csv'
-            )
+    if st.toggle("View Deleted Category Logs"):
+        st.write("Logs of deleted categories (newest first):")
+        paged_table(
+            "deleted_category_logs",
+            "/logs/deleted_categories",
+            LOG_FIELDS,
+            "No logs found for deleted categories.",
+            newest_first=True
+        )
+
+        # Allow logs to be downloaded as CSV
+        if st.button("Prepare CSV of deleted category logs"):
+            logs = fetch_logs_of_deleted_categories()
+            if logs:
+                st.download_button(
+                    label="Download logs as CSV :material/download:",
+                    data=pd.DataFrame(logs).to_csv(index=False),
+                    file_name="deleted_category_logs.csv",
+                    mime='text/csv'
+                )
+
+with l_tab3:
+    # Totals are grouped on the server, so the charts cost the same at any history length
+    days = st.select_slider("Period (days)", options=[7, 30, 90, 365], value=30)
+    since = (pd.Timestamp.utcnow().tz_localize(None) - pd.Timedelta(days=days)).floor("D").isoformat()
+    by_day_params = {"group_by": "day", "since": since}
+    by_action_params = {"group_by": "action", "since": since}
+    prefetch((api_get, "/logs/aggregate", by_day_params), (api_get, "/logs/aggregate", by_action_params))
+    try:
+        by_day_status, by_day = api_get("/logs/aggregate", by_day_params)
+        by_action_status, by_action = api_get("/logs/aggregate", by_action_params)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Failed to fetch activity: {e}")
+    else:
+        if by_day_status != 200 or not by_day:
+            st.info("No activity in this period.")
         else:
-            st.info("No logs found for deleted categories.")
+            activity = pd.DataFrame(by_day).set_index("day")
+            st.write("Changes per day:")
+            st.bar_chart(activity["count"])
+            st.write("Net quantity change per day:")
+            st.bar_chart(activity["quantity_change"])
+            if by_action_status == 200:
+                st.dataframe(pd.DataFrame(by_action), width="stretch", hide_index=True)
+
+    # Parquet keeps types and loads much faster than CSV in pandas/Arrow tools
+    st.write("Exports for analysis:")
+    for export_name in ("items", "logs"):
+        if st.button(f"Prepare Parquet of all {export_name}"):
+            try:
+                response = get_session().get(f"{API_URL}/export/{export_name}.parquet", timeout=120)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                st.error(f"Failed to export {export_name}: {e}")
+            else:
+                st.download_button(
+                    label=f"Download {export_name} as Parquet :material/download:",
+                    data=response.content,
+                    file_name=f"{export_name}.parquet",
+                    mime="application/vnd.apache.parquet"
+                )
 
 st.divider()
+
+# Debug sidebar with render timings
+if st.sidebar.checkbox("Show debug info"):
+    with st.sidebar.expander("Render timings", expanded=True):
+        st.write(f"Page rendered in {(time.perf_counter() - render_started) * 1000:.0f} ms")
+        if fetch_timings:
+            st.write("Fetched in parallel this run:")
+            st.table(pd.DataFrame(
+                [{"request": label, "ms": round(ms, 1)} for label, ms in fetch_timings.items()]
+            ))
@@ -1,6 +1,7 @@
 # main.py
 
 import os
+import threading
 from kivy.lang import Builder
 from kivy.properties import StringProperty, ListProperty, NumericProperty
 from kivy.core.window import Window
@@ -8,12 +9,13 @@ from kivy.clock import mainthread
 from kivy.uix.screenmanager import ScreenManager, Screen, NoTransition
 from kivy.metrics import dp
 from kivymd.app import MDApp
+from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.dialog import MDDialog
-from kivymd.uix.list import OneLineListItem
 from dotenv import load_dotenv
 import requests
 import pandas as pd
 from pdf_test import generate_pdf  # Ensure this module is available
+from replica import LocalReplica
 
 # Optional: Set window size (useful during development)
 # Window.size = (360, 640)
@@ -24,6 +26,48 @@ load_dotenv()
 API_URL = os.getenv("API_URL")
 LOGO_PATH = os.getenv("LOGO_PATH")
 PASSWORD = os.getenv("PASSWORD")
+REQUEST_TIMEOUT = 10
+
+# Screens render from this local copy and only pull deltas from the backend
+replica = LocalReplica()
+
+
+def run_in_background(work, on_done, on_error):
+    """Runs work() on a worker thread and hands its result (or exception) to the callbacks on the UI thread."""
+    def worker():
+        try:
+            result = work()
+        except Exception as e:
+            mainthread(on_error)(e)
+        else:
+            mainthread(on_done)(result)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def sync_replica():
+    cursor = replica.cursor()
+    params = {"since": cursor} if cursor else {}
+    response = requests.get(f"{API_URL}/sync", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    replica.apply(response.json())
+
+
+def load_with_sync(read, on_done, on_error):
+    """Shows read() from the replica right away, then again once a background sync has landed."""
+    rows = read()
+    on_done(rows)
+
+    def work():
+        sync_replica()
+        return read()
+
+    def failed(e):
+        # Working offline from the replica is expected; only complain when there is nothing to show
+        if not rows:
+            on_error(e)
+
+    run_in_background(work, on_done, failed)
 
 
 class LoginScreen(Screen):
@@ -48,23 +92,18 @@ class CategoriesScreen(Screen):
         self.fetch_categories()
 
     def fetch_categories(self):
-        try:
-            response = requests.get(f"{API_URL}/categories/")
-            if response.status_code == 200:
-                self.categories = response.json()
-                self.display_categories()
-            else:
-                self.show_dialog("Error", "Failed to fetch categories")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        load_with_sync(
+            replica.categories,
+            self.display_categories,
+            lambda e: self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        )
 
-    @mainthread
-    def display_categories(self):
-        categories_list = self.ids.categories_list
-        categories_list.clear_widgets()
-        for category in self.categories:
-            item = OneLineListItem(text=f"ID: {category['id']} | Name: {category['name']}")
-            categories_list.add_widget(item)
+    def display_categories(self, categories):
+        self.categories = categories
+        # RecycleView only builds the rows on screen, so the widget count stays flat however long the list is
+        self.ids.categories_list.data = [
+            {"text": f"ID: {category['id']} | Name: {category['name']}"} for category in categories
+        ]
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -89,24 +128,17 @@ class ItemsScreen(Screen):
         self.fetch_items()
 
     def fetch_items(self):
-        try:
-            response = requests.get(f"{API_URL}/items/")
-            if response.status_code == 200:
-                self.items = response.json()
-                self.display_items()
-            else:
-                self.show_dialog("Error", "Failed to fetch items")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch items: {e}")
+        load_with_sync(
+            replica.items,
+            self.display_items,
+            lambda e: self.show_dialog("Error", f"Failed to fetch items: {e}")
+        )
 
-    @mainthread
-    def display_items(self):
-        items_list = self.ids.items_list
-        items_list.clear_widgets()
-        for item in self.items:
-            text = f"ID: {item['id']} | Name: {item['name']} | Qty: {item['quantity']}"
-            list_item = OneLineListItem(text=text)
-            items_list.add_widget(list_item)
+    def display_items(self, items):
+        self.items = items
+        self.ids.items_list.data = [
+            {"text": f"ID: {item['id']} | Name: {item['name']} | Qty: {item['quantity']}"} for item in items
+        ]
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -133,16 +165,21 @@ class CreateCategoryScreen(Screen):
             self.show_dialog("Error", "Category name cannot be empty")
             return
 
-        try:
-            response = requests.post(f"{API_URL}/categories/", json={"name": name, "description": description})
+        def on_done(response):
             if response.status_code == 201:
                 self.show_dialog("Success", "Category created successfully")
                 self.ids.category_name.text = ''
                 self.ids.category_description.text = ''
             else:
                 self.show_dialog("Error", f"Failed to create category: {response.text}")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to create category: {e}")
+
+        run_in_background(
+            lambda: requests.post(
+                f"{API_URL}/categories/", json={"name": name, "description": description}, timeout=REQUEST_TIMEOUT
+            ),
+            on_done,
+            lambda e: self.show_dialog("Error", f"Failed to create category: {e}")
+        )
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -164,26 +201,27 @@ class EditCategoryScreen(Screen):
     category_names = ListProperty([])
     selected_category = StringProperty('')
     selected_category_id = NumericProperty(None)
+    selected_category_version = None
 
     def on_pre_enter(self):
         self.fetch_categories()
 
     def fetch_categories(self):
-        try:
-            response = requests.get(f"{API_URL}/categories/")
-            if response.status_code == 200:
-                categories = response.json()
-                self.category_names = [cat['name'] for cat in categories]
-                self.categories = categories
-            else:
-                self.show_dialog("Error", "Failed to fetch categories")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        load_with_sync(
+            replica.categories,
+            self.set_categories,
+            lambda e: self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        )
+
+    def set_categories(self, categories):
+        self.category_names = [cat['name'] for cat in categories]
+        self.categories = categories
 
     def on_category_select(self, selected_name):
         category = next((cat for cat in self.categories if cat['name'] == selected_name), None)
         if category:
             self.selected_category_id = category['id']
+            self.selected_category_version = category.get('version')
             self.ids.new_category_name.text = category['name'] or ''
             self.ids.new_category_description.text = category.get('description', '') or ''
 
@@ -199,23 +237,33 @@ class EditCategoryScreen(Screen):
             self.show_dialog("Error", "No category selected")
             return
 
-        try:
-            response = requests.put(
-                f"{API_URL}/categories/{self.selected_category_id}/",
-                json={
-                    "name": new_name,
-                    "description": new_description
-                }
-            )
+        def on_done(response):
             if response.status_code == 200:
                 self.show_dialog("Success", "Category updated successfully")
                 self.ids.new_category_name.text = ''
                 self.ids.new_category_description.text = ''
                 self.manager.current = 'categories'
+            elif response.status_code == 409:
+                self.show_dialog("Conflict", "This category was changed by someone else. Reopen it and try again.")
             else:
                 self.show_dialog("Error", f"Failed to update category: {response.text}")
-        except requests.exceptions.RequestException as e:
-            self.show_dialog("Error", f"Failed to update category: {e}")
+
+        category_id = self.selected_category_id
+        # The server answers 409 if the category changed since this copy was synced
+        version = self.selected_category_version
+        run_in_background(
+            lambda: requests.put(
+                f"{API_URL}/categories/{category_id}/",
+                json={
+                    "name": new_name,
+                    "description": new_description
+                },
+                headers={"If-Match": f'"{version}"'} if version is not None else None,
+                timeout=REQUEST_TIMEOUT
+            ),
+            on_done,
+            lambda e: self.show_dialog("Error", f"Failed to update category: {e}")
+        )
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -242,16 +290,15 @@ class DeleteCategoryScreen(Screen):
         self.fetch_categories()
 
     def fetch_categories(self):
-        try:
-            response = requests.get(f"{API_URL}/categories/")
-            if response.status_code == 200:
-                categories = response.json()
-                self.category_names = [cat['name'] for cat in categories]
-                self.categories = categories
-            else:
-                self.show_dialog("Error", "Failed to fetch categories")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        load_with_sync(
+            replica.categories,
+            self.set_categories,
+            lambda e: self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        )
+
+    def set_categories(self, categories):
+        self.category_names = [cat['name'] for cat in categories]
+        self.categories = categories
 
     def on_category_select(self, selected_name):
         category = next((cat for cat in self.categories if cat['name'] == selected_name), None)
@@ -271,17 +318,22 @@ class DeleteCategoryScreen(Screen):
             self.show_dialog("Error", "No category selected")
             return
 
+        def on_done(response):
+            if response.status_code == 204:
+                self.show_dialog("Success", "Category deleted successfully")
+                self.ids.confirmation_input.text = ''
+                self.manager.current = 'categories'
+            else:
+                self.show_dialog("Error", f"Failed to delete category: {response.text}")
+
+        category_id = self.selected_category_id
+
         def confirm_deletion():
-            try:
-                response = requests.delete(f"{API_URL}/categories/{self.selected_category_id}/")
-                if response.status_code == 204:
-                    self.show_dialog("Success", "Category deleted successfully")
-                    self.ids.confirmation_input.text = ''
-                    self.manager.current = 'categories'
-                else:
-                    self.show_dialog("Error", f"Failed to delete category: {response.text}")
-            except Exception as e:
-                self.show_dialog("Error", f"Failed to delete category: {e}")
+            run_in_background(
+                lambda: requests.delete(f"{API_URL}/categories/{category_id}/", timeout=REQUEST_TIMEOUT),
+                on_done,
+                lambda e: self.show_dialog("Error", f"Failed to delete category: {e}")
+            )
 
         # Confirmation dialog
         confirmation_dialog = MDDialog(
@@ -326,16 +378,15 @@ class CreateItemScreen(Screen):
         self.fetch_categories()
 
     def fetch_categories(self):
-        try:
-            response = requests.get(f"{API_URL}/categories/")
-            if response.status_code == 200:
-                categories = response.json()
-                self.category_names = [cat['name'] for cat in categories]
-                self.category_dict = {cat['name']: cat['id'] for cat in categories}
-            else:
-                self.show_dialog("Error", "Failed to fetch categories")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        load_with_sync(
+            replica.categories,
+            self.set_categories,
+            lambda e: self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        )
+
+    def set_categories(self, categories):
+        self.category_names = [cat['name'] for cat in categories]
+        self.category_dict = {cat['name']: cat['id'] for cat in categories}
 
     def create_item(self):
         name = self.ids.item_name.text.strip()
@@ -357,13 +408,7 @@ class CreateItemScreen(Screen):
 
         category_id = self.category_dict[category_name]
 
-        try:
-            response = requests.post(f"{API_URL}/items/", json={
-                "name": name,
-                "description": description,
-                "quantity": int(quantity),
-                "category_id": category_id
-            })
+        def on_done(response):
             if response.status_code == 201:
                 self.show_dialog("Success", "Item created successfully")
                 self.ids.item_name.text = ''
@@ -372,8 +417,17 @@ class CreateItemScreen(Screen):
                 self.ids.item_category_spinner.text = 'Select Category'
             else:
                 self.show_dialog("Error", f"Failed to create item: {response.text}")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to create item: {e}")
+
+        run_in_background(
+            lambda: requests.post(f"{API_URL}/items/", json={
+                "name": name,
+                "description": description,
+                "quantity": int(quantity),
+                "category_id": category_id
+            }, timeout=REQUEST_TIMEOUT),
+            on_done,
+            lambda e: self.show_dialog("Error", f"Failed to create item: {e}")
+        )
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -395,21 +449,21 @@ class EditItemScreen(Screen):
     category_names = ListProperty([])
     category_dict = {}
     current_item_id = NumericProperty(None)
+    current_item_etag = None
 
     def on_pre_enter(self):
         self.fetch_categories()
 
     def fetch_categories(self):
-        try:
-            response = requests.get(f"{API_URL}/categories/")
-            if response.status_code == 200:
-                categories = response.json()
-                self.category_names = [cat['name'] for cat in categories]
-                self.category_dict = {cat['name']: cat['id'] for cat in categories}
-            else:
-                self.show_dialog("Error", "Failed to fetch categories")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        load_with_sync(
+            replica.categories,
+            self.set_categories,
+            lambda e: self.show_dialog("Error", f"Failed to fetch categories: {e}")
+        )
+
+    def set_categories(self, categories):
+        self.category_names = [cat['name'] for cat in categories]
+        self.category_dict = {cat['name']: cat['id'] for cat in categories}
 
     def load_item(self):
         item_id = self.ids.edit_item_id.text.strip()
@@ -417,11 +471,11 @@ class EditItemScreen(Screen):
             self.show_dialog("Error", "Invalid Item ID")
             return
 
-        try:
-            response = requests.get(f"{API_URL}/items/{item_id}/")
+        def on_done(response):
             if response.status_code == 200:
                 item = response.json()
                 self.current_item_id = item['id']
+                self.current_item_etag = response.headers.get('ETag')
                 self.ids.edit_item_name.text = item['name'] or ''
                 self.ids.edit_item_description.text = item.get('description', '') or ''
                 self.ids.edit_item_quantity.text = str(item.get('quantity', '')) or ''
@@ -429,8 +483,12 @@ class EditItemScreen(Screen):
                 self.ids.edit_item_category_spinner.text = category_name
             else:
                 self.show_dialog("Error", f"Item not found: {response.text}")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to fetch item details: {e}")
+
+        run_in_background(
+            lambda: requests.get(f"{API_URL}/items/{item_id}/", timeout=REQUEST_TIMEOUT),
+            on_done,
+            lambda e: self.show_dialog("Error", f"Failed to fetch item details: {e}")
+        )
 
     def update_item(self):
         if not self.current_item_id:
@@ -456,13 +514,7 @@ class EditItemScreen(Screen):
 
         category_id = self.category_dict[category_name]
 
-        try:
-            response = requests.put(f"{API_URL}/items/{self.current_item_id}/", json={
-                "name": name,
-                "description": description,
-                "quantity": int(quantity),
-                "category_id": category_id
-            })
+        def on_done(response):
             if response.status_code == 200:
                 self.show_dialog("Success", "Item updated successfully")
                 self.ids.edit_item_id.text = ''
@@ -471,10 +523,24 @@ class EditItemScreen(Screen):
                 self.ids.edit_item_quantity.text = ''
                 self.ids.edit_item_category_spinner.text = 'Select Category'
                 self.current_item_id = None
+            elif response.status_code == 409:
+                self.show_dialog("Conflict", "This item was changed by someone else. Load it again and retry.")
             else:
                 self.show_dialog("Error", f"Failed to update item: {response.text}")
-        except Exception as e:
-            self.show_dialog("Error", f"Failed to update item: {e}")
+
+        item_id = self.current_item_id
+        # Send back the ETag from load_item; the server answers 409 if the item changed since
+        etag = self.current_item_etag
+        run_in_background(
+            lambda: requests.put(f"{API_URL}/items/{item_id}/", json={
+                "name": name,
+                "description": description,
+                "quantity": int(quantity),
+                "category_id": category_id
+            }, headers={"If-Match": etag} if etag else None, timeout=REQUEST_TIMEOUT),
+            on_done,
+            lambda e: self.show_dialog("Error", f"Failed to update item: {e}")
+        )
 
     def show_dialog(self, title, message):
         dialog = MDDialog(
@@ -499,16 +565,19 @@ class DeleteItemScreen(Screen):
             self.show_dialog("Error", "Invalid Item ID")
             return
 
+        def on_done(response):
+            if response.status_code == 204:
+                self.show_dialog("Success", "Item deleted successfully")
+                self.ids.delete_item_id.text = ''
+            else:
+                self.show_dialog("Error", f"Failed to delete item: {response.text}")
+
         def confirm_deletion():
-            try:
-                response = requests.delete(f"{API_URL}/items/{item_id}/")
-                if response.status_code == 204:
-                    self.show_dialog("Success", "Item deleted successfully")
-                    self.ids.delete_item_id.text = ''
-                else:
-                    self.show_dialog("Error", f"Failed to delete item: {response.text}")
-            except Exception as e:
-                self.show_dialog("Error", f"Failed to delete item: {e}")
+            run_in_background(
+                lambda: requests.delete(f"{API_URL}/items/{item_id}/", timeout=REQUEST_TIMEOUT),
+                on_done,
+                lambda e: self.show_dialog("Error", f"Failed to delete item: {e}")
+            )
 
         # Confirmation dialog
         confirmation_dialog = MDDialog(
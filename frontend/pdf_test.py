@@ -185,48 +185,17 @@ def html_to_flowables(html_content, styles, base_indent=20, indent_increment=20)
 
     return flowables
 
-def generate_pdf(category_name, category_description, items_df, logo_filename):
+def build_styles():
     """
-    Generates a PDF report for a given category with a table of items.
-
-    Parameters:
-    - category_name (str): The name of the category.
-    - category_description (str): An HTML description of the category.
-    - items_df (pd.DataFrame): DataFrame containing item details.
-    - logo_filename (str): Filename of the logo image to include.
+    Builds the stylesheet used by generate_pdf and html_to_flowables.
 
     Returns:
-    - bytes: The generated PDF as a byte string.
+    - StyleSheet1: Sample stylesheet extended with the report's custom styles.
     """
-
-    # Remove redundant columns if they exist
-    columns_to_remove = ['category_id', 'id']  # Adjust based on actual column names
-    items_df = items_df.drop(columns=[col for col in columns_to_remove if col in items_df.columns], errors='ignore')
-
-    # Replace 'quantity' column name with 'qty' if it exists
-    if 'quantity' in items_df.columns:
-        items_df = items_df.rename(columns={'quantity': 'qty'})
-
-    # Create a BytesIO buffer to receive PDF data
-    buffer = BytesIO()
-
-    # Define the PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=LETTER,
-        rightMargin=20,
-        leftMargin=20,
-        topMargin=20,
-        bottomMargin=20,
-    )
-
-    elements = []
-
     # Register Helvetica font (optional, as it's usually available by default)
     # Uncomment the following lines if you have a custom font file
     # pdfmetrics.registerFont(TTFont('Helvetica', 'Helvetica.ttf'))
 
-    # Define Styles
     styles = getSampleStyleSheet()
 
     # Added: Define CustomParagraph Style
@@ -295,6 +264,48 @@ def generate_pdf(category_name, category_description, items_df, logo_filename):
         spaceAfter=5
     ))
 
+    return styles
+
+def generate_pdf(category_name, category_description, items_df, logo_filename):
+    """
+    Generates a PDF report for a given category with a table of items.
+
+    Parameters:
+    - category_name (str): The name of the category.
+    - category_description (str): An HTML description of the category.
+    - items_df (pd.DataFrame): DataFrame containing item details.
+    - logo_filename (str): Filename of the logo image to include.
+
+    Returns:
+    - bytes: The generated PDF as a byte string.
+    """
+
+    # Remove redundant columns if they exist
+    columns_to_remove = ['category_id', 'id']  # Adjust based on actual column names
+    items_df = items_df.drop(columns=[col for col in columns_to_remove if col in items_df.columns], errors='ignore')
+
+    # Replace 'quantity' column name with 'qty' if it exists
+    if 'quantity' in items_df.columns:
+        items_df = items_df.rename(columns={'quantity': 'qty'})
+
+    # Create a BytesIO buffer to receive PDF data
+    buffer = BytesIO()
+
+    # Define the PDF document
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=LETTER,
+        rightMargin=20,
+        leftMargin=20,
+        topMargin=20,
+        bottomMargin=20,
+    )
+
+    elements = []
+
+    # Define Styles
+    styles = build_styles()
+
     # Function to convert snake_case to Title Case
     def snake_to_title(snake_str):
         components = snake_str.split('_')
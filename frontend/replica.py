@@ -0,0 +1,65 @@
+# frontend/replica.py
+import os
+import sqlite3
+import threading
+
+REPLICA_PATH = os.getenv("REPLICA_PATH", "replica.db")
+
+CATEGORY_COLUMNS = ("id", "name", "description", "created_at", "updated_at", "version")
+ITEM_COLUMNS = ("id", "name", "description", "quantity", "category_id", "created_at", "updated_at", "version")
+
+
+class LocalReplica:
+    """Local SQLite copy of categories and items, kept current from the backend's /sync deltas."""
+
+    def __init__(self, path=REPLICA_PATH):
+        # One connection shared by the UI thread and sync workers, serialized by the lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS categories (
+                    id INTEGER PRIMARY KEY, name TEXT, description TEXT, created_at TEXT, updated_at TEXT,
+                    version INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY, name TEXT, description TEXT, quantity INTEGER,
+                    category_id INTEGER, created_at TEXT, updated_at TEXT, version INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            # Replicas created before rows carried a version; it fills in as rows change
+            for table in ("categories", "items"):
+                if "version" not in {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER")
+
+    def _select(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def categories(self):
+        return self._select("SELECT * FROM categories ORDER BY id")
+
+    def items(self):
+        return self._select("SELECT * FROM items ORDER BY id")
+
+    def cursor(self):
+        rows = self._select("SELECT value FROM meta WHERE key = 'cursor'")
+        return rows[0]["value"] if rows else None
+
+    def apply(self, delta):
+        with self.lock, self.conn:
+            if delta["full"]:
+                self.conn.execute("DELETE FROM categories")
+                self.conn.execute("DELETE FROM items")
+            # Deletes go first so a reused id that shows up as a change in the same delta survives
+            for table in ("categories", "items"):
+                ids = delta["deleted"].get(table, [])
+                self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(row_id,) for row_id in ids])
+            for table, columns in (("categories", CATEGORY_COLUMNS), ("items", ITEM_COLUMNS)):
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [tuple(row.get(column) for column in columns) for row in delta[table]]
+                )
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (delta["cursor"],))